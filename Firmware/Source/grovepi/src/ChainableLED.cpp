@@ -46,8 +46,8 @@ void ChainableLED::begin(byte clk_pin, byte data_pin, byte number_of_leds)
   
     _led_state = (byte*) calloc(_num_leds*3, sizeof(byte));
 
-    for (byte i=0; i<_num_leds; i++)
-        setColorRGB(i, 0, 0, 0);
+    // All leds start off
+    show();
 }
 
 //ChainableLED::~begin()
@@ -101,6 +101,22 @@ void ChainableLED::sendColor(byte red, byte green, byte blue)
 }
 
 void ChainableLED::setColorRGB(byte led, byte red, byte green, byte blue)
+{
+    storeColorRGB(led, red, green, blue);
+    show();
+}
+
+void ChainableLED::storeColorRGB(byte led, byte red, byte green, byte blue)
+{
+    if (led >= _num_leds)
+        return;
+
+    _led_state[led*3 + _CL_RED] = red;
+    _led_state[led*3 + _CL_GREEN] = green;
+    _led_state[led*3 + _CL_BLUE] = blue;
+}
+
+void ChainableLED::show()
 {
     // Send data frame prefix (32x "0")
     sendByte(0x00);
@@ -111,13 +127,6 @@ void ChainableLED::setColorRGB(byte led, byte red, byte green, byte blue)
     // Send color data for each one of the leds
     for (byte i=0; i<_num_leds; i++)
     {
-        if (i == led)
-        {
-            _led_state[i*3 + _CL_RED] = red;
-            _led_state[i*3 + _CL_GREEN] = green;
-            _led_state[i*3 + _CL_BLUE] = blue;
-        }
-                    
         sendColor(_led_state[i*3 + _CL_RED], 
                   _led_state[i*3 + _CL_GREEN], 
                   _led_state[i*3 + _CL_BLUE]);
@@ -47,6 +47,8 @@ public:
     // ~begin();
     
     void setColorRGB(byte led, byte red, byte green, byte blue);
+    void storeColorRGB(byte led, byte red, byte green, byte blue); // Change the led state without sending it
+    void show();                                                    // Send the state of all leds to the chain
     //void setColorHSB(byte led, float hue, float saturation, float brightness);
     
     byte getNumLeds();
@@ -47,7 +47,7 @@ decode_results results; // results for the IR receiver
 
 #define data_not_available 23
 
-volatile uint8_t cmd[5];
+volatile uint8_t cmd[32]; // 4 byte commands, up to the Wire buffer size for bulk data
 volatile int index = 0;
 volatile int flag = 0;
 volatile byte b[21], float_array[4], dht_b[21];
@@ -90,6 +90,17 @@ byte accFlag = 0, clkFlag = 0;
 int8_t accv[3];
 byte rgb[] = {0, 0, 0};
 
+// for LED bar animations
+#define ledbar_seq_max_frames 12
+typedef struct {
+  uint16_t bits[ledbar_seq_max_frames], delay[ledbar_seq_max_frames];
+  uint16_t next_delay; // delay given to frames appended from now on
+  uint8_t length, current, repeat, loops;
+  bool playing;
+  unsigned long last_update;
+} LedBar_Sequence;
+LedBar_Sequence ledbar_seq[6]; // one sequence per Grove_LED_Bar instance
+
 // all user-defined functions
 void processIO();
 void flushI2C();
@@ -98,6 +109,7 @@ void sendData();
 void detachISRPin(const uint8_t);
 void isr_buffer_filler();
 void isr_handler(uint8_t, bool);
+void ledbar_animate();
 
 void setup() {
   // Start serial
@@ -127,6 +139,10 @@ void processIO() {
 
   if (index == 4 && flag == 0) {
     flag = 1;
+    // setting a LED bar directly stops its animation
+    if (cmd[0] >= 50 && cmd[0] <= 55 && cmd[1] >= 2 && cmd[1] < 8)
+      ledbar_seq[cmd[1] - 2].playing = false;
+
     // Digital Read
     if (cmd[0] == 1)
     {
@@ -224,6 +240,11 @@ void processIO() {
     // [54, pin, led, unused]         toggleLed(unsigned char led)
     // [55, pin, bits 1-8, bits 9-10] setBits(unsigned int bits)
     // [56, pin, unused, unused]      getBits()
+    // [57, pin, unused, unused]      clear the stored animation
+    // [58, pin, ms 1-8, ms 9-16]     delay for the frames added after this
+    // [59, pin, bits 1-8, bits 9-10] add a frame to the animation
+    // [60, pin, repeat, unused]      play the animation, repeat = 0 loops forever
+    // [61, pin, unused, unused]      stop the animation on the current frame
 
     // Initialise
     // [50, pin, orientation, unused]
@@ -284,6 +305,51 @@ void processIO() {
       b[2] = state >> 8;
     }
 
+    // Clear the stored animation and stop playing it
+    // [57, pin, unused, unused]
+    else if (cmd[0] == 57 && cmd[1] >= 2 && cmd[1] < 8) {
+      ledbar_seq[cmd[1] - 2].length = 0;
+      ledbar_seq[cmd[1] - 2].playing = false;
+    }
+
+    // Set the delay in ms of the frames added from now on
+    // [58, pin, ms 1-8, ms 9-16]
+    else if (cmd[0] == 58 && cmd[1] >= 2 && cmd[1] < 8) {
+      ledbar_seq[cmd[1] - 2].next_delay = cmd[2] ^ (cmd[3] << 8);
+    }
+
+    // Add a frame to the animation, one bit for each led
+    // [59, pin, bits 1-8, bits 9-10]
+    else if (cmd[0] == 59 && cmd[1] >= 2 && cmd[1] < 8) {
+      LedBar_Sequence *seq = &ledbar_seq[cmd[1] - 2];
+      if (seq->length < ledbar_seq_max_frames) {
+        seq->bits[seq->length] = cmd[2] ^ (cmd[3] << 8);
+        seq->delay[seq->length] = seq->next_delay;
+        seq->length++;
+      }
+    }
+
+    // Play the animation from the first frame
+    // repeat (0 = loop forever, otherwise play the frames this many times)
+    // [60, pin, repeat, unused]
+    else if (cmd[0] == 60 && cmd[1] >= 2 && cmd[1] < 8 && ledbar[cmd[1] - 2].ready()) {
+      LedBar_Sequence *seq = &ledbar_seq[cmd[1] - 2];
+      if (seq->length > 0) {
+        seq->repeat = cmd[2];
+        seq->loops = 0;
+        seq->current = 0;
+        seq->playing = true;
+        seq->last_update = millis();
+        ledbar[cmd[1] - 2].setBits(seq->bits[0]);
+      }
+    }
+
+    // Stop the animation, the current frame stays on the bar
+    // [61, pin, unused, unused]
+    else if (cmd[0] == 61 && cmd[1] >= 2 && cmd[1] < 8) {
+      ledbar_seq[cmd[1] - 2].playing = false;
+    }
+
     // end Grove LED Bar
 
     // Grove 4 Digit Display (7 segment)
@@ -421,6 +487,9 @@ void processIO() {
     // leds to the stored color by pattern [94, pin, led offset, modulo divisor]
     // set one or more leds to the stored color by modulo [95, pin, level,
     // reverse]             sets leds similar to a bar graph, reversible
+    // [96, pin, first led, r, g, b, r, g, b, ...] store colors of up to 9 leds
+    // without showing them (longer than 4 bytes, handled further down)
+    // [97, pin, unused, unused]             show the stored colors on all leds
 
     // Store RGB color for later use
     // [90, red, green, blue]
@@ -534,6 +603,12 @@ void processIO() {
           }
         }
       }
+    }
+
+    // Show the colors stored with command 96 on the whole chain at once
+    // [97, pin, unused, unused]
+    else if (cmd[0] == 97 && rgbled[cmd[1] - 2].ready()) {
+      rgbled[cmd[1] - 2].show();
     } else if (cmd[0] == ir_recv_pin_cmd) {
       Serial.print(cmd[1]);
       irrecv.setRecvpin(cmd[1]);
@@ -639,6 +714,20 @@ void processIO() {
       }
       run_once = 0;
     }
+  } else if (cmd[0] == 96) {
+
+    // Store the colors of consecutive leds, shown by the next command 97
+    // [96, pin, first led, r, g, b, r, g, b, ...]
+    if (run_once == 1) {
+      if (rgbled[cmd[1] - 2].ready()) {
+        for (int idx = 3; idx + 2 < index; idx += 3) {
+          rgbled[cmd[1] - 2].storeColorRGB(cmd[2] + (idx - 3) / 3, cmd[idx],
+                                           cmd[idx + 1], cmd[idx + 2]);
+        }
+      }
+      run_once = 0;
+    }
+
   } else if (cmd[0] == encoder_en_cmd) {
 
     if (run_once == 1) {
@@ -701,17 +790,46 @@ void loop() {
   } else {
     processIO();
   }
+  ledbar_animate();
+}
+
+// advance the LED bar animations whose frame delay has run out
+void ledbar_animate() {
+  const unsigned long current = millis();
+  for (int idx = 0; idx < 6; idx++) {
+    LedBar_Sequence *seq = &ledbar_seq[idx];
+    if (!seq->playing || current - seq->last_update < seq->delay[seq->current])
+      continue;
+
+    if (seq->current + 1 < seq->length) {
+      seq->current++;
+    } else {
+      seq->loops++;
+      if (seq->repeat != 0 && seq->loops >= seq->repeat) {
+        // leave the last frame on the bar
+        seq->playing = false;
+        continue;
+      }
+      seq->current = 0;
+    }
+    seq->last_update = current;
+    ledbar[idx].setBits(seq->bits[seq->current]);
+  }
 }
 
 void receiveData(int byteCount) {
   if (!need_extra_loop) {
     while (Wire.available()) {
-      if (Wire.available() == 4) {
+      // a new command is either 4 bytes or a longer bulk data packet
+      if (Wire.available() == (byteCount > 4 ? byteCount : 4)) {
         flag = 0;
         index = 0;
         run_once = 1;
       }
-      cmd[index++] = Wire.read();
+      if (index < sizeof(cmd))
+        cmd[index++] = Wire.read();
+      else
+        Wire.read();
     }
     need_extra_loop = true;
   } else {
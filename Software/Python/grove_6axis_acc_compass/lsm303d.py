@@ -16,6 +16,7 @@ import time,sys
 import RPi.GPIO as GPIO
 import smbus
 import math
+import numpy
 
 # use the bus that matches your raspi version
 rev = GPIO.RPI_REVISION
@@ -24,6 +25,21 @@ if rev == 2 or rev == 3:
 else:
     bus = smbus.SMBus(0)
 
+# Tilt compensated heading in degrees (0-360) for arrays of samples
+# accel: (N, 3) accelerometer values, any unit
+# mag: (N, 3) or (3,) compass values, any unit
+def tiltHeading(accel, mag):
+	accel = numpy.atleast_2d(numpy.asarray(accel, dtype=numpy.float64))
+	mag = numpy.atleast_2d(numpy.asarray(mag, dtype=numpy.float64))
+	accel = accel / numpy.linalg.norm(accel, axis=1)[:, numpy.newaxis]
+
+	pitch = numpy.arcsin(numpy.clip(-accel[:, 0], -1, 1))
+	roll = numpy.arcsin(numpy.clip(accel[:, 1] / numpy.cos(pitch), -1, 1))
+
+	xh = mag[:, 0] * numpy.cos(pitch) + mag[:, 2] * numpy.sin(pitch)
+	yh = mag[:, 0] * numpy.sin(roll) * numpy.sin(pitch) + mag[:, 1] * numpy.cos(roll) - mag[:, 2] * numpy.sin(roll) * numpy.cos(pitch)
+	return numpy.degrees(numpy.arctan2(yh, xh)) % 360
+
 class lsm303d:
 	# LSM303 Address definitions
 	LSM303D_ADDR	= 0x1E  # assuming SA0 grounded
@@ -93,6 +109,14 @@ class lsm303d:
 
 	ACCELE_SCALE 	= 2
 
+	AUTO_INCREMENT	= 0x80 # set on the register address for multi-byte reads
+	FIFO_EN			= 0x40 # in CTRL_REG0
+	FIFO_BYPASS		= 0x00
+	FIFO_STREAM		= 0x40 # in FIFO_CTRL
+	FIFO_SAMPLES	= 0x1F # in FIFO_SRC
+	FIFO_OVERRUN	= 0x40 # in FIFO_SRC
+	FIFO_BURST		= 5    # samples per SMBus block read (max 32 bytes)
+
 	X 				= 0
 	Y 				= 1
 	Z 				= 2
@@ -122,6 +146,14 @@ class lsm303d:
 	def read_reg(self,reg):
 		return bus.read_byte_data(self.LSM303D_ADDR, reg)
 
+	# Read consecutive registers in one transaction
+	def read_block(self,reg,length):
+		return bus.read_i2c_block_data(self.LSM303D_ADDR, reg|self.AUTO_INCREMENT, length)
+
+	# Read the 3 little endian words starting at reg, as signed values
+	def read_axes(self,reg):
+		return [int(v) for v in numpy.array(self.read_block(reg, 6), dtype=numpy.uint8).view('<i2')]
+
 	# Check if compass is ready
 	def isMagReady(self):
 		if self.read_reg(self.STATUS_REG_M)&0x03!=0:
@@ -130,17 +162,7 @@ class lsm303d:
 
 	# Get raw accelerometer values
 	def getAccel(self):
-		raw_accel=[0,0,0]
-		raw_accel[0]=((self.read_reg(self.OUT_X_H_A)<<8)|self.read_reg(self.OUT_X_L_A))
-		raw_accel[1]=((self.read_reg(self.OUT_Y_H_A)<<8)|self.read_reg(self.OUT_Y_L_A))
-		raw_accel[2]=((self.read_reg(self.OUT_Z_H_A)<<8)|self.read_reg(self.OUT_Z_L_A))
-
-		#2's compiment
-		for i in range(3):
-			if raw_accel[i]>32767:
-				raw_accel[i]=raw_accel[i]-65536
-
-		return raw_accel
+		return self.read_axes(self.OUT_X_L_A)
 
 	# Get accelerometer values in g
 	def getRealAccel(self):
@@ -152,17 +174,42 @@ class lsm303d:
 
 	# Get compass raw values
 	def getMag(self):
-		raw_mag=[0,0,0]
-		raw_mag[0]=(self.read_reg(self.OUT_X_H_M)<<8)|self.read_reg(self.OUT_X_L_M)
-		raw_mag[1]=(self.read_reg(self.OUT_Y_H_M)<<8)|self.read_reg(self.OUT_Y_L_M)
-		raw_mag[2]=(self.read_reg(self.OUT_Z_H_M)<<8)|self.read_reg(self.OUT_Z_L_M)
-
-		#2's compiment
-		for i in range(3):
-			if raw_mag[i]>32767:
-				raw_mag[i]=raw_mag[i]-65536
-
-		return raw_mag
+		return self.read_axes(self.OUT_X_L_M)
+
+	# Keep the newest 32 accelerometer samples in the FIFO
+	def enableAccelFifo(self):
+		self.write_reg(self.read_reg(self.CTRL_REG0)|self.FIFO_EN, self.CTRL_REG0)
+		self.write_reg(self.FIFO_STREAM, self.FIFO_CTRL)
+
+	def disableAccelFifo(self):
+		self.write_reg(self.FIFO_BYPASS, self.FIFO_CTRL)
+		self.write_reg(self.read_reg(self.CTRL_REG0)&~self.FIFO_EN, self.CTRL_REG0)
+
+	# Drain the accelerometer FIFO, returns an (N, 3) array of values in g, oldest first
+	# With the FIFO on, the address rolls over from OUT_Z_H_A to OUT_X_L_A,
+	# so one block read returns several samples
+	def readAccelFifo(self):
+		src=self.read_reg(self.FIFO_SRC)
+		samples=src&self.FIFO_SAMPLES
+		if src&self.FIFO_OVERRUN:
+			# the FIFO was full, the current sample is waiting on top of it
+			samples+=1
+
+		data=[]
+		while samples>0:
+			count=min(samples,self.FIFO_BURST)
+			data.extend(self.read_block(self.OUT_X_L_A, 6*count))
+			samples-=count
+
+		raw=numpy.array(data, dtype=numpy.uint8).view('<i2').reshape(-1, 3)
+		return raw / math.pow(2, 15) * self.ACCELE_SCALE
+
+	# Read the queued accelerometer samples and the current compass value,
+	# returns (accel, mag, headings) with a tilt compensated heading per accelerometer sample
+	def readBatch(self):
+		accel=self.readAccelFifo()
+		mag=self.getMag()
+		return accel, mag, tiltHeading(accel, mag)
 
 	# Get heading from the compass
 	def getHeading(self):
@@ -175,27 +222,7 @@ class lsm303d:
 		return round(heading,3)
 
 	def getTiltHeading(self):
-		magValue=self.getMag()
-		accelValue=self.getRealAccel()
-
-		X=self.X
-		Y=self.Y
-		Z=self.Z
-
-		pitch = math.asin(-accelValue[X])
-
-		print(accelValue[Y],pitch,math.cos(pitch),accelValue[Y]/math.cos(pitch),math.asin(accelValue[Y]/math.cos(pitch)))
-		roll = math.asin(accelValue[Y]/math.cos(pitch))
-
-		xh = magValue[X] * math.cos(pitch) + magValue[Z] * math.sin(pitch)
-		yh = magValue[X] * math.sin(roll) * math.sin(pitch) + magValue[Y] * math.cos(roll) - magValue[Z] * math.sin(roll) * math.cos(pitch)
-		zh = -magValue[X] * (roll) * math.sin(pitch) + magValue[Y] * math.sin(roll) + magValue[Z] * math.cos(roll) * math.cos(pitch)
-		heading = 180 * math.atan2(yh, xh)/math.pi
-
-		if (yh >= 0):
-			return heading
-		else:
-			return (360 + heading)
+		return round(float(tiltHeading(self.getAccel(), self.getMag())[0]),3)
 
 if __name__ == "__main__":
 	acc_mag=lsm303d()
@@ -206,6 +233,4 @@ if __name__ == "__main__":
 			if acc_mag.isMagReady():
 				break
 		print(acc_mag.getHeading())
-
-		# Do not use, math error
-		# print acc_mag.getTiltHeading()
+		print(acc_mag.getTiltHeading())
@@ -8,6 +8,7 @@
 # http://shop.pimoroni.com/products/adafruit-triple-axis-accelerometer
 
 import smbus
+import numpy
 from time import sleep
 
 # select the correct i2c bus for this revision of Raspberry Pi
@@ -22,7 +23,12 @@ SCALE_MULTIPLIER    = 0.004
 DATA_FORMAT         = 0x31
 BW_RATE             = 0x2C
 POWER_CTL           = 0x2D
+INT_SOURCE          = 0x30
+FIFO_CTL            = 0x38
+FIFO_STATUS         = 0x39
 
+# the rates are the bandwidth, the output data rate is twice as high
+# (BW_RATE_1600HZ samples at 3200 Hz)
 BW_RATE_1600HZ      = 0x0F
 BW_RATE_800HZ       = 0x0E
 BW_RATE_400HZ       = 0x0D
@@ -39,9 +45,37 @@ RANGE_16G           = 0x03
 MEASURE             = 0x08
 AXES_DATA           = 0x32
 
+FIFO_BYPASS         = 0x00
+FIFO_STREAM         = 0x80
+FIFO_ENTRIES        = 0x3F
+FIFO_SIZE           = 32
+OVERRUN             = 0x01
+
+# raised by readFifo when samples were dropped because the FIFO was not
+# drained in time, .samples holds what could still be read
+class FifoOverrunError(IOError):
+    def __init__(self, samples):
+        IOError.__init__(self, "ADXL345 FIFO overrun, samples were lost")
+        self.samples = samples
+
+# converts raw DATAX0..DATAZ1 bytes, 6 per sample, to an (N, 3) array
+#
+# parameter gforce:
+#    False (default): result is returned in m/s^2
+#    True           : result is returned in gs
+def axesFromBytes(data, gforce = False):
+    raw = numpy.asarray(data, dtype=numpy.uint8).reshape(-1, 6)
+    # each axis is a little endian two's complement word
+    axes = raw.view('<i2').astype(numpy.float64) * SCALE_MULTIPLIER
+    if gforce == False:
+        axes *= EARTH_GRAVITY_MS2
+    return axes
+
 class ADXL345:
 
     address = None
+    rate_flag = None
+    overruns = 0
 
     def __init__(self, address = 0x53):
         self.address = address
@@ -54,6 +88,11 @@ class ADXL345:
 
     def setBandwidthRate(self, rate_flag):
         bus.write_byte_data(self.address, BW_RATE, rate_flag)
+        self.rate_flag = rate_flag
+
+    # samples per second for the current bandwidth rate
+    def getDataRate(self):
+        return 3200.0 / 2 ** (0x0F - (self.rate_flag & 0x0F))
 
     # set the measurement range for 10-bit readings
     def setRange(self, range_flag):
@@ -100,6 +139,63 @@ class ADXL345:
 
         return {"x": x, "y": y, "z": z}
 
+    # keep the newest 32 samples in the FIFO, the chip drops the oldest ones
+    # when it's not drained in time
+    #
+    # parameter watermark: number of samples (1-31) that raises the watermark flag
+    def enableFifoStream(self, watermark = 16):
+        bus.write_byte_data(self.address, FIFO_CTL, FIFO_STREAM | (watermark & 0x1F))
+
+    def disableFifo(self):
+        bus.write_byte_data(self.address, FIFO_CTL, FIFO_BYPASS)
+
+    # number of samples waiting in the FIFO
+    def getFifoEntries(self):
+        return bus.read_byte_data(self.address, FIFO_STATUS) & FIFO_ENTRIES
+
+    # drains the FIFO and returns the samples as an (N, 3) array, oldest first
+    # raises FifoOverrunError if samples were dropped since the last read
+    #
+    # each sample takes one 6 byte read, which is what pops it from the FIFO.
+    # That is about 0.9 ms per sample on the default 100 kHz bus, so at most
+    # BW_RATE_200HZ (400 samples per second) keeps up reliably. With the bus at
+    # 400 kHz (dtparam=i2c_arm_baudrate=400000) BW_RATE_800HZ (1600 samples per
+    # second) does, BW_RATE_1600HZ is faster than the FIFO can be drained.
+    def readFifo(self, gforce = False):
+        # the overrun flag is cleared by reading the data, so check it first
+        overrun = bus.read_byte_data(self.address, INT_SOURCE) & OVERRUN
+        entries = self.getFifoEntries()
+
+        data = []
+        for i in range(entries):
+            data.extend(bus.read_i2c_block_data(self.address, AXES_DATA, 6))
+
+        samples = axesFromBytes(data, gforce)
+        if overrun:
+            self.overruns += 1
+            raise FifoOverrunError(samples)
+        return samples
+
+    # enables the FIFO in stream mode and yields (N, 3) arrays of samples
+    # as they come in, until the generator is closed or a FifoOverrunError
+    # shows the rate is too high for the bus (see readFifo)
+    #
+    # parameter interval: seconds between FIFO reads, by default the time
+    #                     it takes to fill half of it
+    def stream(self, gforce = False, interval = None):
+        if interval is None:
+            interval = FIFO_SIZE / 2 / self.getDataRate()
+
+        self.enableFifoStream()
+        try:
+            while True:
+                samples = self.readFifo(gforce)
+                if len(samples):
+                    yield samples
+                sleep(interval)
+        finally:
+            self.disableFifo()
+
 if __name__ == "__main__":
     # if run directly we'll just create an instance of the class and output
     # the current readings
@@ -24,6 +24,7 @@
 # ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import time
+import json
 from Adafruit_I2C import Adafruit_I2C
 import math
 
@@ -58,6 +59,10 @@ class BMP085 :
   __BMP085_READTEMPCMD       = 0x2E
   __BMP085_READPRESSURECMD   = 0x34
 
+  # Pressure conversion time for each operating mode, in seconds
+  __BMP085_PRESSUREWAIT      = [0.005, 0.008, 0.014, 0.026]
+  __BMP085_CAL_NAMES         = ["AC1", "AC2", "AC3", "AC4", "AC5", "AC6", "B1", "B2", "MB", "MC", "MD"]
+
   # Private Fields
   _cal_AC1 = 0
   _cal_AC2 = 0
@@ -72,11 +77,16 @@ class BMP085 :
   _cal_MD = 0
 
   # Constructor
-  def __init__(self, address=0x77, mode=1, debug=False):
+  # calibrationFile: optional path where the calibration EEPROM is cached, so only AC1 and AC2 are read to check it
+  # temperatureInterval: seconds a temperature reading is reused by sample()
+  def __init__(self, address=0x77, mode=1, debug=False, calibrationFile=None, temperatureInterval=1.0):
     self.i2c = Adafruit_I2C(address)
 
     self.address = address
     self.debug = debug
+    self.temperatureInterval = temperatureInterval
+    self._lastRawTemp = None
+    self._lastRawTempTime = 0
     # Make sure the specified mode is in the appropriate range
     if ((mode < 0) | (mode > 3)):
       if (self.debug):
@@ -85,7 +95,10 @@ class BMP085 :
     else:
       self.mode = mode
     # Read the calibration data
-    self.readCalibrationData()
+    if calibrationFile is None or not self.loadCalibrationData(calibrationFile):
+      self.readCalibrationData()
+      if calibrationFile is not None:
+        self.saveCalibrationData(calibrationFile)
 
   def readS16(self, register):
     "Reads a signed 16-bit value"
@@ -99,21 +112,62 @@ class BMP085 :
     lo = self.i2c.readU8(register+1)
     return (hi << 8) + lo
 
+  def readList(self, register, length):
+    "Reads length bytes in one transfer, raises IOError if the bus read fails"
+    data = self.i2c.readList(register, length)
+    # Adafruit_I2C returns -1 instead of raising
+    if not isinstance(data, list):
+      raise IOError("BMP085 at 0x%02X: reading %d bytes from register 0x%02X failed" % (self.address, length, register))
+    return data
+
   def readCalibrationData(self):
-    "Reads the calibration data from the IC"
-    self._cal_AC1 = self.readS16(self.__BMP085_CAL_AC1)   # INT16
-    self._cal_AC2 = self.readS16(self.__BMP085_CAL_AC2)   # INT16
-    self._cal_AC3 = self.readS16(self.__BMP085_CAL_AC3)   # INT16
-    self._cal_AC4 = self.readU16(self.__BMP085_CAL_AC4)   # UINT16
-    self._cal_AC5 = self.readU16(self.__BMP085_CAL_AC5)   # UINT16
-    self._cal_AC6 = self.readU16(self.__BMP085_CAL_AC6)   # UINT16
-    self._cal_B1 = self.readS16(self.__BMP085_CAL_B1)     # INT16
-    self._cal_B2 = self.readS16(self.__BMP085_CAL_B2)     # INT16
-    self._cal_MB = self.readS16(self.__BMP085_CAL_MB)     # INT16
-    self._cal_MC = self.readS16(self.__BMP085_CAL_MC)     # INT16
-    self._cal_MD = self.readS16(self.__BMP085_CAL_MD)     # INT16
+    "Reads the calibration data from the IC in one burst"
+    data = self.readList(self.__BMP085_CAL_AC1, 22)
+    words = [(data[i] << 8) + data[i+1] for i in range(0, 22, 2)]
+    # AC4, AC5 and AC6 are UINT16, the others INT16
+    for i, name in enumerate(self.__BMP085_CAL_NAMES):
+      if name not in ("AC4", "AC5", "AC6") and words[i] > 32767:
+        words[i] -= 65536
+      setattr(self, "_cal_" + name, words[i])
+    if (self.debug):
+      self.showCalibrationData()
+
+  def loadCalibrationData(self, filename):
+    "Loads calibration data saved by saveCalibrationData, returns False if there is none for this sensor"
+    try:
+      with open(filename) as f:
+        calibration = json.load(f)[str(self.address)]
+    except (IOError, ValueError, KeyError):
+      return False
+    # The file is keyed by address, so check AC1 and AC2 still match in case
+    # another sensor was plugged in at the same address
+    data = self.readList(self.__BMP085_CAL_AC1, 4)
+    ac1 = (data[0] << 8) + data[1]
+    if ac1 > 32767:
+      ac1 -= 65536
+    ac2 = (data[2] << 8) + data[3]
+    if ac2 > 32767:
+      ac2 -= 65536
+    if (calibration.get("AC1"), calibration.get("AC2")) != (ac1, ac2):
+      if (self.debug):
+        print("DBG: Cached calibration is for another sensor")
+      return False
+    for name in self.__BMP085_CAL_NAMES:
+      setattr(self, "_cal_" + name, calibration[name])
     if (self.debug):
       self.showCalibrationData()
+    return True
+
+  def saveCalibrationData(self, filename):
+    "Saves the calibration data, keyed by the I2C address of the sensor"
+    try:
+      with open(filename) as f:
+        calibrations = json.load(f)
+    except (IOError, ValueError):
+      calibrations = {}
+    calibrations[str(self.address)] = dict((name, getattr(self, "_cal_" + name)) for name in self.__BMP085_CAL_NAMES)
+    with open(filename, "w") as f:
+      json.dump(calibrations, f)
 
   def showCalibrationData(self):
       "Displays the calibration values for debugging purposes"
@@ -133,7 +187,8 @@ class BMP085 :
     "Reads the raw (uncompensated) temperature from the sensor"
     self.i2c.write8(self.__BMP085_CONTROL, self.__BMP085_READTEMPCMD)
     time.sleep(0.005)  # Wait 5ms
-    raw = self.readU16(self.__BMP085_TEMPDATA)
+    msb, lsb = self.readList(self.__BMP085_TEMPDATA, 2)
+    raw = (msb << 8) + lsb
     if (self.debug):
       print("DBG: Raw Temp: 0x%04X (%d)" % (raw & 0xFFFF, raw))
     return raw
@@ -141,17 +196,8 @@ class BMP085 :
   def readRawPressure(self):
     "Reads the raw (uncompensated) pressure level from the sensor"
     self.i2c.write8(self.__BMP085_CONTROL, self.__BMP085_READPRESSURECMD + (self.mode << 6))
-    if (self.mode == self.__BMP085_ULTRALOWPOWER):
-      time.sleep(0.005)
-    elif (self.mode == self.__BMP085_HIGHRES):
-      time.sleep(0.014)
-    elif (self.mode == self.__BMP085_ULTRAHIGHRES):
-      time.sleep(0.026)
-    else:
-      time.sleep(0.008)
-    msb = self.i2c.readU8(self.__BMP085_PRESSUREDATA)
-    lsb = self.i2c.readU8(self.__BMP085_PRESSUREDATA+1)
-    xlsb = self.i2c.readU8(self.__BMP085_PRESSUREDATA+2)
+    time.sleep(self.__BMP085_PRESSUREWAIT[self.mode])
+    msb, lsb, xlsb = self.readList(self.__BMP085_PRESSUREDATA, 3)
     raw = ((msb << 16) + (lsb << 8) + xlsb) >> (8 - self.mode)
     if (self.debug):
       print("DBG: Raw Pressure: 0x%04X (%d)" % (raw & 0xFFFF, raw))
@@ -285,4 +331,46 @@ class BMP085 :
       print("DBG: Altitude = %.2f m" % (altitude))
     return altitude
 
-    return 0
+  def compensate(self, UT, UP):
+    "Returns (temperature in C, pressure in Pa) for raw readings, with the datasheet integer math"
+    def div(a, b):
+      # C integer division truncates towards zero
+      return int(float(a) / b)
+
+    X1 = ((UT - self._cal_AC6) * self._cal_AC5) >> 15
+    X2 = div(self._cal_MC << 11, X1 + self._cal_MD)
+    B5 = X1 + X2
+    temp = ((B5 + 8) >> 4) / 10.0
+
+    B6 = B5 - 4000
+    X1 = (self._cal_B2 * ((B6 * B6) >> 12)) >> 11
+    X2 = (self._cal_AC2 * B6) >> 11
+    X3 = X1 + X2
+    B3 = div(((self._cal_AC1 * 4 + X3) << self.mode) + 2, 4)
+    X1 = (self._cal_AC3 * B6) >> 13
+    X2 = (self._cal_B1 * ((B6 * B6) >> 12)) >> 16
+    X3 = ((X1 + X2) + 2) >> 2
+    B4 = (self._cal_AC4 * (X3 + 32768)) >> 15
+    B7 = (UP - B3) * (50000 >> self.mode)
+    if (B7 < 0x80000000):
+      p = div(B7 * 2, B4)
+    else:
+      p = div(B7, B4) * 2
+    X1 = (p >> 8) * (p >> 8)
+    X1 = (X1 * 3038) >> 16
+    X2 = (-7357 * p) >> 16
+    p = p + ((X1 + X2 + 3791) >> 4)
+    return temp, p
+
+  def sample(self, seaLevelPressure=101325):
+    "Returns (temperature in C, pressure in Pa, altitude in m) from one acquisition"
+    # the temperature changes slowly, so it is only converted again after temperatureInterval
+    now = time.time()
+    if self._lastRawTemp is None or now - self._lastRawTempTime >= self.temperatureInterval:
+      self._lastRawTemp = self.readRawTemp()
+      self._lastRawTempTime = now
+    UP = self.readRawPressure()
+    temp, pressure = self.compensate(self._lastRawTemp, UP)
+    # same formula as readAltitude
+    altitude = round( -math.log( float(pressure) / seaLevelPressure ) * 8314 * ( temp + 273.15 ) / ( 25 * 9.81 ) , 2 )
+    return temp, pressure, altitude
@@ -5,6 +5,65 @@
 import time
 from Adafruit_I2C import Adafruit_I2C
 import math
+import numpy
+
+def _div(a, b):
+    # C integer division, truncating towards zero
+    return numpy.sign(a) * numpy.sign(b) * (numpy.abs(a) // numpy.abs(b))
+
+def compensate(cal, adc_T, adc_P, adc_H):
+    """Compensate raw readings with the integer formulas of the datasheet (4.2.3).
+
+    cal is the dict returned by BME280.readCalibrationData, the raw values
+    can be ints or NumPy int64 arrays.  Returns (temperature in 0.01 C,
+    pressure in Q24.8 Pa, humidity in Q22.10 %RH).
+    """
+    var1 = (((adc_T >> 3) - (cal["T1"] << 1)) * cal["T2"]) >> 11
+    var2 = (((((adc_T >> 4) - cal["T1"]) * ((adc_T >> 4) - cal["T1"])) >> 12) * cal["T3"]) >> 14
+    t_fine = var1 + var2
+    temperature = (t_fine * 5 + 128) >> 8
+
+    # 64 bit pressure compensation
+    var1 = t_fine - 128000
+    var2 = var1 * var1 * cal["P6"]
+    var2 = var2 + ((var1 * cal["P5"]) << 17)
+    var2 = var2 + (cal["P4"] << 35)
+    var1 = ((var1 * var1 * cal["P3"]) >> 8) + ((var1 * cal["P2"]) << 12)
+    var1 = (((1 << 47) + var1) * cal["P1"]) >> 33
+    valid = var1 != 0
+    var1 = numpy.where(valid, var1, 1)
+    p = 1048576 - adc_P
+    p = _div(((p << 31) - var2) * 3125, var1)
+    var1 = (cal["P9"] * (p >> 13) * (p >> 13)) >> 25
+    var2 = (cal["P8"] * p) >> 19
+    pressure = numpy.where(valid, ((p + var1 + var2) >> 8) + (cal["P7"] << 4), 0)
+
+    v_x1 = t_fine - 76800
+    v_x1 = ((((adc_H << 14) - (cal["H4"] << 20) - (cal["H5"] * v_x1)) + 16384) >> 15) * \
+           (((((((v_x1 * cal["H6"]) >> 10) * (((v_x1 * cal["H3"]) >> 11) + 32768)) >> 10) + 2097152) * cal["H2"] + 8192) >> 14)
+    v_x1 = v_x1 - (((((v_x1 >> 15) * (v_x1 >> 15)) >> 7) * cal["H1"]) >> 4)
+    humidity = numpy.clip(v_x1, 0, 419430400) >> 12
+
+    return temperature, pressure, humidity
+
+def unpackRaw(data):
+    """Split 8 byte bursts from press_msb (0xF7) to hum_lsb (0xFE) into (adc_T, adc_P, adc_H).
+
+    data is a list of 8 bytes or an (N, 8) array of logged bursts.
+    """
+    data = numpy.asarray(data, dtype=numpy.int64)
+    adc_P = (data[..., 0] << 12) | (data[..., 1] << 4) | (data[..., 2] >> 4)
+    adc_T = (data[..., 3] << 12) | (data[..., 4] << 4) | (data[..., 5] >> 4)
+    adc_H = (data[..., 6] << 8) | data[..., 7]
+    return adc_T, adc_P, adc_H
+
+def compensateArray(cal, data):
+    """Replay logged raw bursts, data is an (N, 8) array as returned by BME280.readRaw.
+
+    Returns (temperature in C, pressure in Pa, humidity in %RH) as float arrays.
+    """
+    temperature, pressure, humidity = compensate(cal, *unpackRaw(data))
+    return temperature / 100.0, pressure / 256.0, humidity / 1024.0
 
 class BME280:
     i2c = None
@@ -35,6 +94,7 @@ class BME280:
     __REG_DIG_H6 = 0xE6
 
     # Chip ID (5.4.1)
+    __REG_ID            = 0xD0
     __BME280_CHIP_ID    = 0x60
 
     # Soft reset (5.4.2)
@@ -89,22 +149,124 @@ class BME280:
     __CONFIG_T_FILTER_8   = 0b011
     __CONFIG_T_FILTER_16  = 0b100
 
-    # press, raw pressure (5.4.7)
-    __BME280_REG_PRESS = 0xF7
+    # press, temp and hum data registers, read in one burst (4.)
+    __REG_DATA = 0xF7
+    __DATA_LENGTH = 8
 
-    # temp, raw temperature (5.4.8)
-    __BME280_REG_TEMP = 0xFA
+    # Calibration data blocks (4.2.2)
+    __REG_CALIB_00 = 0x88
+    __CALIB_00_LENGTH = 26
+    __REG_CALIB_26 = 0xE1
+    __CALIB_26_LENGTH = 7
 
-    # hum, raw humidity (5.4.9)
-    __BME280_REG_TEMP = 0xFD
+    __OVERSAMPLING = {0: 0b000, 1: 0b001, 2: 0b010, 4: 0b011, 8: 0b100, 16: 0b101}
+    __STANDBY = {0.5: 0b000, 62.5: 0b001, 125: 0b010, 250: 0b011, 500: 0b100, 1000: 0b101, 10: 0b110, 20: 0b111}
+    __FILTER = {0: 0b000, 2: 0b001, 4: 0b010, 8: 0b011, 16: 0b100}
 
     def __init__(self,
-                 address=self.__BME280_ADDRESS,
-                 mode=self.__BME280_CTRL_MEAS_MODE_NORMAL,
+                 address=__ADDRESS,
+                 standby=62.5,
+                 oversampling=(1, 1, 1),
+                 filter=0,
                  debug=False):
+        """Set the BME280 up in normal mode, measuring continuously.
+
+        standby: ms between measurements, 0.5, 10, 20, 62.5, 125, 250, 500 or 1000
+        oversampling: (temperature, pressure, humidity) oversampling, each 0 (skip), 1, 2, 4, 8 or 16
+        filter: IIR filter coefficient, 0 (off), 2, 4, 8 or 16
+        """
         self.i2c = Adafruit_I2C(address)
 
         self.address = address
         self.debug = debug
 
-        if (mode > __BME280_ADDRESS
+        if self.i2c.readU8(self.__REG_ID) != self.__BME280_CHIP_ID:
+            raise IOError("No BME280 found at address 0x%02X" % address)
+
+        self.i2c.write8(self.__REG_RESET, self.__SOFT_RESET)
+        time.sleep(0.002)
+        while self.i2c.readU8(self.__REG_STATUS) & self.__STATUS_UPDATING:
+            time.sleep(0.001)
+
+        self.readCalibrationData()
+        self.setMode(standby, oversampling, filter)
+
+    def setMode(self, standby=62.5, oversampling=(1, 1, 1), filter=0):
+        "Start measuring continuously (normal mode) with the given settings"
+        osrs_t, osrs_p, osrs_h = [self.__OVERSAMPLING[o] for o in oversampling]
+
+        # config is only written in sleep mode (5.4.6)
+        self.i2c.write8(self.__REG_CTRL_MEAS, self.__CTRL_MEAS_MODE_SLEEP)
+        self.i2c.write8(self.__REG_CONFIG, (self.__STANDBY[standby] << 5) | (self.__FILTER[filter] << 2))
+        # ctrl_hum only takes effect after writing ctrl_meas (5.4.3)
+        self.i2c.write8(self.__REG_CTRL_HUM, osrs_h)
+        self.i2c.write8(self.__REG_CTRL_MEAS, (osrs_t << 5) | (osrs_p << 2) | self.__CTRL_MEAS_MODE_NORMAL)
+
+        # wait for the first measurement to be done (9.1)
+        measurement = 1.25 + 2.3 * oversampling[0]
+        if oversampling[1]:
+            measurement += 2.3 * oversampling[1] + 0.575
+        if oversampling[2]:
+            measurement += 2.3 * oversampling[2] + 0.575
+        time.sleep(measurement / 1000.0)
+
+    def readCalibrationData(self):
+        "Reads the compensation parameters with two block reads"
+        c = self.i2c.readList(self.__REG_CALIB_00, self.__CALIB_00_LENGTH)
+        h = self.i2c.readList(self.__REG_CALIB_26, self.__CALIB_26_LENGTH)
+
+        def u16(data, i):
+            return data[i] | (data[i + 1] << 8)
+
+        def s16(data, i):
+            value = u16(data, i)
+            return value - 65536 if value > 32767 else value
+
+        def s8(value):
+            return value - 256 if value > 127 else value
+
+        self.cal = {
+            "T1": u16(c, 0), "T2": s16(c, 2), "T3": s16(c, 4),
+            "P1": u16(c, 6), "P2": s16(c, 8), "P3": s16(c, 10),
+            "P4": s16(c, 12), "P5": s16(c, 14), "P6": s16(c, 16),
+            "P7": s16(c, 18), "P8": s16(c, 20), "P9": s16(c, 22),
+            "H1": c[25], "H2": s16(h, 0), "H3": h[2],
+            "H4": (s8(h[3]) << 4) | (h[4] & 0x0F),
+            "H5": (s8(h[5]) << 4) | (h[4] >> 4),
+            "H6": s8(h[6]),
+        }
+        if (self.debug):
+            self.showCalibrationData()
+        return self.cal
+
+    def showCalibrationData(self):
+        "Displays the calibration values for debugging purposes"
+        for name in sorted(self.cal):
+            print("DBG: %-2s = %6d" % (name, self.cal[name]))
+
+    def readRaw(self):
+        "Reads the pressure, temperature and humidity data registers in one 8 byte burst"
+        return self.i2c.readList(self.__REG_DATA, self.__DATA_LENGTH)
+
+    def read(self):
+        "Returns (temperature in C, pressure in Pa, humidity in %RH) from the latest measurement"
+        adc_T, adc_P, adc_H = [int(v) for v in unpackRaw(self.readRaw())]
+        temperature, pressure, humidity = compensate(self.cal, adc_T, adc_P, adc_H)
+        return int(temperature) / 100.0, int(pressure) / 256.0, int(humidity) / 1024.0
+
+    def readTemperature(self):
+        "Gets the compensated temperature in degrees celcius"
+        return self.read()[0]
+
+    def readPressure(self):
+        "Gets the compensated pressure in pascal"
+        return self.read()[1]
+
+    def readHumidity(self):
+        "Gets the compensated relative humidity in percent"
+        return self.read()[2]
+
+    def readAltitude(self, seaLevelPressure=101325):
+        "Calculates the altitude in meters"
+        pressure = self.readPressure()
+        return round(44330.0 * (1.0 - pow(pressure / seaLevelPressure, 0.1903)), 2)
@@ -8,66 +8,158 @@
 #
 # This library is derived from the Arduino library written by Oliver Wang for SeeedStudio (https://github.com/Seeed-Studio/Grove_Barometer_HP20x/tree/master/HP20x_dev)
 
-from random import randint
-Rand_Table=[
-0.5377,1.8339,-2.2588,0.8622,0.3188,-1.3077,-0.4336,0.342,3.5784,
-2.7694,-1.3499,3.0349,0.7254,-0.0631,0.7147,-0.2050,-0.1241,1.4897,
-1.4090,1.4172,0.6715,-1.2075,0.7172,1.6302,0.4889,1.0347,0.7269,
--0.3034,0.2939,-0.7873,0.8884,-1.1471,-1.0689,-0.8095,-2.9443,1.4384,
-0.3252,-0.7549,1.3703,-1.7115,-0.1022,-0.2414,0.3192,0.3129,-0.8649,
--0.0301,-0.1649,0.6277,1.0933,1.1093,-0.8637,0.0774,-1.2141,-1.1135,
--0.0068,1.5326,-0.7697,0.3714,-0.2256,1.1174,-1.0891,0.0326,0.5525,
-1.1006,1.5442,0.0859,-1.4916,-0.7423,-1.0616,2.3505,-0.6156,0.7481,
--0.1924,0.8886,-0.7648,-1.4023,-1.4224,0.4882,-0.1774,-0.1961,1.4193,
-0.2916,0.1978,1.5877,-0.8045,0.6966,0.8351,-0.2437,0.2157,-1.1658,
--1.1480,0.1049,0.7223,2.5855,-0.6669,0.1873,-0.0825,-1.9330,-0.439,
--1.7947]
+import numpy
+
+# Samples per block when smoothing arrays in steady state
+Block_Size=64
+
 class KalmanFilter:
-	X_pre=0
-	X_post=0
+	"""Random walk Kalman filter for one or more channels.
+
+	processNoise and measurementNoise are variances, either scalars or one
+	value per channel.  With steadyState the gain starts at its converged
+	value instead of settling over the first samples.  The defaults match
+	the average noise the original table driven filter drew per sample.
+	"""
+	X_pre=None
+	X_post=None
 	P_pre=0
 	P_post=0
 	K_cur=0
 
-	def __init__(self):
-		self.X_pre=0
+	def __init__(self,processNoise=0.9,measurementNoise=0.9,steadyState=False):
+		self.Q=numpy.asarray(processNoise,dtype=float)
+		self.R=numpy.asarray(measurementNoise,dtype=float)
 
-	def Gaussian_Noise_Cov(self):
-		index = 0
-		tmp=[0.0]*10
-		average = 0.0
-		sum = 0.0
+		# Solve P = (P_post + Q) from P_post = (1 - K)*P, K = P/(P + R)
+		self.P_steady=(self.Q+numpy.sqrt(self.Q*self.Q+4*self.Q*self.R))/2-self.Q
+		self.K_steady=(self.P_steady+self.Q)/(self.P_steady+self.Q+self.R)
+		self.steadyState=steadyState
+		self.Reset()
 
-		#Get random number */
-		for i in range(10):
+	def Reset(self):
+		"Forget the state, the next sample initialises the filter"
+		self.X_pre=None
+		self.X_post=None
+		self.P_pre=0
+		self.K_cur=0
+		if self.steadyState:
+			self.P_post=self.P_steady
+		else:
+			self.P_post=self.R
 
-			index = randint(0,90)
-			tmp[i] = Rand_Table[index]
-			sum += tmp[i];
+	def Converged(self):
+		"""True once the gain has settled to the steady state gain
 
-		# Calculate average
-		average = sum/10
-
-		#Calculate Variance
-		Variance = 0.0
-		for j in range(10):
-			Variance += (tmp[j]-average)*(tmp[j]-average)
-		Variance/=10.0
-		return Variance
+		Without process noise the gain keeps falling as 1/n and never
+		settles, FilterArray uses a running mean for that case instead.
+		"""
+		return bool(numpy.all(numpy.abs(self.P_post-self.P_steady)<=1e-12*(self.P_steady+self.Q)))
 
 	def Filter(self,origin):
-		modelNoise = 0.0
-		observeNoise = 0.0
-
-		# Get model and observe Noise
-		modelNoise = self.Gaussian_Noise_Cov()
-		observeNoise = self.Gaussian_Noise_Cov()
+		"Filter one sample, a number or an array with one value per channel"
+		if self.X_post is None:
+			self.X_post=numpy.array(origin,dtype=float) if numpy.ndim(origin) else float(origin)
+			self.X_pre=self.X_post
+			return self.X_post
 
 		# Algorithm
 		self.X_pre = self.X_post
-		self.P_pre = self.P_post + modelNoise;
-		self.K_cur = self.P_pre/(self.P_pre + observeNoise);
-		self.P_post = (1 - self.K_cur)*self.P_pre;
-		self.X_post = self.X_pre + self.K_cur*(origin - self.X_pre);
+		self.P_pre = self.P_post + self.Q
+		self.K_cur = self.P_pre/(self.P_pre + self.R)
+		self.P_post = (1 - self.K_cur)*self.P_pre
+		self.X_post = self.X_pre + self.K_cur*(origin - self.X_pre)
 
 		return self.X_post
+
+	def FilterArray(self,samples):
+		"""Filter samples with time along the first axis, shape (n,) or (n, channels).
+
+		Continues from the current state, so a long log can be fed in pieces.
+		"""
+		z=numpy.asarray(samples,dtype=float)
+		out=numpy.empty_like(z)
+		n=len(z)
+		i=0
+		if n and self.X_post is None:
+			out[0]=self.Filter(z[0])
+			i=1
+
+		# Without process noise the filter is a weighted running mean
+		if i<n and not numpy.any(self.Q) and numpy.all(self.R>0):
+			out[i:]=self._Average(z[i:])
+			return out
+
+		# Let the gain settle sample by sample, it takes a few dozen samples
+		while i<n and (self.X_post is None or not self.Converged()):
+			out[i]=self.Filter(z[i])
+			i+=1
+		if i==n:
+			return out
+
+		out[i:]=self._Smooth(z[i:])
+		self.X_pre=out[-2] if n-i>1 else self.X_post
+		self.X_post=out[-1] if z.ndim==1 else out[-1].copy()
+		if z.ndim==1:
+			self.X_pre=float(self.X_pre)
+			self.X_post=float(self.X_post)
+		self.K_cur=self.K_steady
+		self.P_pre=self.P_steady+self.Q
+		return out
+
+	def _Smooth(self,z):
+		# With a constant gain K the filter is x[j] = a*x[j-1] + K*z[j], a = 1 - K.
+		# Each block is solved as a matrix product with the powers of a, only the
+		# state carried from block to block is a Python loop.
+		n=len(z)
+		shape=z.shape
+		z=z.reshape(n,-1)
+		channels=z.shape[1]
+		K=numpy.broadcast_to(self.K_steady,(channels,))
+		a=1-K
+
+		blocks=-(-n//Block_Size)
+		padded=numpy.zeros((blocks*Block_Size,channels))
+		padded[:n]=z
+		padded=padded.reshape(blocks,Block_Size,channels)
+
+		j=numpy.arange(Block_Size)
+		lag=j[:,None]-j[None,:]
+		weights=numpy.where(lag>=0,a[:,None,None]**numpy.maximum(lag,0),0.0)
+		y=numpy.einsum('cji,bic->bjc',weights,padded)*K
+		decay=a**(j[:,None]+1)
+
+		state=numpy.broadcast_to(numpy.asarray(self.X_post,dtype=float),(channels,)).copy()
+		for b in range(blocks):
+			y[b]+=decay*state
+			state=y[b,-1]
+
+		return y.reshape(blocks*Block_Size,channels)[:n].reshape(shape)
+
+	def _Average(self,z):
+		# With Q = 0, P after k samples is P0*R/(R + k*P0), so the state is the
+		# mean of the samples with the current state weighted as R/P0 samples.
+		n=len(z)
+		shape=(n,)+(1,)*(z.ndim-1)
+		P0=numpy.broadcast_to(numpy.asarray(self.P_post,dtype=float),z.shape[1:])
+		count=numpy.arange(1,n+1,dtype=float).reshape(shape)
+		with numpy.errstate(divide='ignore',invalid='ignore'):
+			weight=self.R/P0
+			out=(weight*self.X_post+numpy.cumsum(z,axis=0))/(weight+count)
+		# a channel with P = 0 is certain and ignores the samples
+		out=numpy.where(P0>0,out,self.X_post)
+
+		self.P_pre=P0*self.R/(self.R+(n-1)*P0)
+		self.K_cur=self.P_pre/(self.P_pre+self.R)
+		self.P_post=P0*self.R/(self.R+n*P0)
+		self.X_pre=out[-2] if n>1 else self.X_post
+		self.X_post=out[-1]
+		if z.ndim==1:
+			self.X_pre=float(self.X_pre)
+			self.X_post=float(self.X_post)
+			self.P_pre=float(self.P_pre)
+			self.K_cur=float(self.K_cur)
+			self.P_post=float(self.P_post)
+		else:
+			self.X_post=self.X_post.copy()
+		return out
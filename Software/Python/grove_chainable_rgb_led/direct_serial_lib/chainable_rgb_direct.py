@@ -29,91 +29,102 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 '''
 # Note: Connect the chainable LED to port RPISER on the GrovePi
+# To drive it through the SPI peripheral instead, wire CI to SCLK (BCM 11) and DI to MOSI (BCM 10)
+# and pass spi_bus to rgb_led
 import time,sys
 import RPi.GPIO as GPIO
 import smbus
 
+try:
+	import spidev
+except ImportError:
+	spidev = None
+
+# Start and end of a P9813 frame
+FRAME_BOUNDARY=[0,0,0,0]
+# Data line level for each bit of every byte value, most significant bit first
+BYTE_BITS=[[(value >> (7 - bit)) & 0x01 for bit in range(8)] for value in range(256)]
+
+def colorBytes(r,g,b):
+	# Flag byte (two leading 1s, then the inverted top 2 bits of blue, green and red) followed by b, g, r
+	prefix = 0b11000000 | ((~b & 0xC0) >> 2) | ((~g & 0xC0) >> 4) | ((~r & 0xC0) >> 6)
+	return [prefix, b & 0xFF, g & 0xFF, r & 0xFF]
+
 class rgb_led:
 	r_all=[]
 	g_all=[]
 	b_all=[]
 	
-	def __init__(self,led=1):
+	def __init__(self,led=1,spi_bus=None,spi_device=0,spi_speed=1000000):
 		GPIO.setwarnings(False)
 		self.num_led=led
 		self.r_all=[0] * self.num_led
 		self.g_all=[0] * self.num_led
 		self.b_all=[0] * self.num_led
-		             
+		# Bytes of the last frame clocked out, to skip sending an unchanged chain
+		self.last_frame=None
+		# Clock half period in microseconds, the P9813 doesn't need one with RPi.GPIO
+		self.tv_nsec= 0
+		
+		if spi_bus is not None:
+			if spidev is None:
+				raise ImportError("spidev is needed to drive the LEDs over SPI")
+			self.spi=spidev.SpiDev()
+			self.spi.open(spi_bus,spi_device)
+			self.spi.max_speed_hz=spi_speed
+			self.spi.mode=0
+			return
+		
+		self.spi=None
 		GPIO.setmode(GPIO.BCM)  
 		self.clk_pin= 15 #RX pin BCM
 		self.data_pin= 14 # TX pin BCM 
-		self.tv_nsec= 100
 		GPIO.setup(self.clk_pin, GPIO.OUT)
 		GPIO.setup(self.data_pin, GPIO.OUT)
+		# The  ic will latch a bit of data when the rising edge of the clock coming, And the data should changed after the falling edge of the clock; 
+		# Copyed from P9813 datasheet
+		# so each bit is one write of clock low + data, then one of clock high
+		self.pins=[self.clk_pin, self.data_pin]
+
+	def sendBytes(self,data):
+		if self.spi is not None:
+			# spidev transfers at most 4096 bytes at a time
+			for i in range(0,len(data),4096):
+				self.spi.writebytes(list(data[i:i+4096]))
+			return
+		
+		delay=self.tv_nsec/1000000.0
+		for b in data:
+			for bit in BYTE_BITS[b]:
+				GPIO.output(self.pins,(0,bit))
+				if delay:
+					time.sleep(delay)
+				GPIO.output(self.clk_pin,1)
+				if delay:
+					time.sleep(delay)
 
 	def sendByte(self,b):
-		# print b
-		for loop in range(8):
-			# digitalWrite(CLKPIN, LOW);
-			GPIO.output(self.clk_pin,0)
-			time.sleep(self.tv_nsec/1000000.0)
-			# nanosleep(&TIMCLOCKINTERVAL, NULL);
-			
-			# The  ic will latch a bit of data when the rising edge of the clock coming, And the data should changed after the falling edge of the clock; 
-			# Copyed from P9813 datasheet
-			
-			if (b & 0x80) != 0:
-				# digitalWrite(DATPIN, HIGH)
-				GPIO.output(self.data_pin,1)
-			else:
-				# digitalWrite(DATPIN, LOW):
-				GPIO.output(self.data_pin,0)
-			
-			# digitalWrite(CLKPIN, HIGH);
-			GPIO.output(self.clk_pin,1)
-			# nanosleep(&TIMCLOCKINTERVAL, NULL);
-			time.sleep(self.tv_nsec/1000000.0)
-			# //usleep(CLOCKINTERVAL);
-			
-			b <<= 1
+		self.sendBytes([b])
 			
 	def sendColor(self,r, g, b):
-		prefix = 0b11000000;
-		if (b & 0x80) == 0:
-			prefix |= 0b00100000
-		if (b & 0x40) == 0:	
-			prefix |= 0b00010000
-		if (g & 0x80) == 0:	
-			prefix |= 0b00001000
-		if (g & 0x40) == 0:	
-			prefix |= 0b00000100
-		if (r & 0x80) == 0:	
-			prefix |= 0b00000010
-		if (r & 0x40) == 0:	
-			prefix |= 0b00000001
+		self.sendBytes(colorBytes(r, g, b))
 	
-		self.sendByte(prefix)
-		self.sendByte(b)
-		self.sendByte(g)
-		self.sendByte(r)
+	def sendFrame(self,data):
+		# Clock out a whole frame unless the LEDs already show it
+		if data == self.last_frame:
+			return
+		self.sendBytes(data)
+		self.last_frame=data
 		
 	def setColorRGB(self,r,g,b):
-		for i in range(4):
-			self.sendByte(0)
-		
-		self.sendColor(r, g, b);
-		
-		for i in range(4):
-			self.sendByte(0)
+		self.sendFrame(FRAME_BOUNDARY + colorBytes(r, g, b) + FRAME_BOUNDARY)
 		
 	def setColorRGBs(self,r,g,b,count):
-		for i in range(4):
-				self.sendByte(0)
+		data=list(FRAME_BOUNDARY)
 		for i in range(count):
-			self.sendColor(r[i], g[i], b[i])
-		for i in range(4):
-				self.sendByte(0)
+			data.extend(colorBytes(r[i], g[i], b[i]))
+		data.extend(FRAME_BOUNDARY)
+		self.sendFrame(data)
 	
 	def setOneLED(self,r,g,b,led_num):
 		self.r_all[led_num]=r
@@ -122,6 +133,10 @@ class rgb_led:
 		
 		self.setColorRGBs(self.r_all,self.g_all,self.b_all,self.num_led)
 		
+	def close(self):
+		if self.spi is not None:
+			self.spi.close()
+		
 	
 if __name__ == "__main__":	
 	num_led=3
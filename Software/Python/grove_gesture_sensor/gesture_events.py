@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+#
+# GrovePi Example for using the Grove - Gesture Sensor v1.0(http://www.seeedstudio.com/depot/Grove-Gesture-p-2463.html)
+#		
+# This example reads gestures from a background thread, leaving the main loop free
+#
+# The GrovePi connects the Raspberry Pi and Grove sensors.  You can learn more about GrovePi here:  http://www.dexterindustries.com/GrovePi
+#
+# Have a question about this example?  Ask on the forums here:  http://forum.dexterindustries.com/c/grovepi
+#
+'''
+## License
+
+The MIT License (MIT)
+
+GrovePi for the Raspberry Pi: an open source platform for connecting Grove Sensors to the Raspberry Pi.
+Copyright (C) 2017  Dexter Industries
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+'''
+
+import grove_gesture_sensor
+
+g=grove_gesture_sensor.gesture()
+g.init()
+
+names={g.FORWARD:"FORWARD", g.BACKWARD:"BACKWARD", g.RIGHT:"RIGHT", g.LEFT:"LEFT", g.UP:"UP",
+	g.DOWN:"DOWN", g.CLOCKWISE:"CLOCKWISE", g.ANTI_CLOCKWISE:"ANTI_CLOCKWISE", g.WAVE:"WAVE"}
+
+# Pass irq_pin=<BCM GPIO> to wait for the sensor INT line instead of polling
+reader=grove_gesture_sensor.GestureEvents(g)
+reader.start()
+while True:
+	# Do other work here, gestures queue up with the time they were seen
+	timestamp,gest=reader.events.get()
+	print("%.3f %s" %(timestamp,names[gest]))
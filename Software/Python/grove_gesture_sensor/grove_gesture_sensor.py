@@ -17,8 +17,13 @@
 # For more information see https://github.com/DexterInd/GrovePi/blob/master/LICENSE
 
 import time,sys
+import threading
 import RPi.GPIO as GPIO
 import smbus
+try:
+	import queue
+except ImportError:
+	import Queue as queue
 
 # use the bus that matches your raspi version
 rev = GPIO.RPI_REVISION
@@ -332,6 +337,9 @@ class gesture:
 						[0x7D,0x03],
 						[0x7E,0x01])
 
+	#Largest block written in one transfer during init
+	I2C_BLOCK_SIZE=32
+
 	#Enable debug message
 	debug=0
 
@@ -351,8 +359,8 @@ class gesture:
 		if data0 == 0x20:
 			print("wake-up finish.")
 
-		for i in range(len(self.initRegisterArray)):
-			self.paj7620WriteReg(self.initRegisterArray[i][0],self.initRegisterArray[i][1])
+		for addr,data in self.initRegisterBlocks():
+			self.paj7620WriteBlock(addr,data)
 
 		self.paj7620SelectBank(self.BANK0)
 
@@ -362,6 +370,25 @@ class gesture:
 	def paj7620WriteReg(self,addr,cmd):
 		bus.write_word_data(self.PAJ7620_ID, addr, cmd)
 
+	#Write consecutive registers starting at "addr" in one transfer, the sensor increments the address
+	def paj7620WriteBlock(self,addr,data):
+		bus.write_i2c_block_data(self.PAJ7620_ID, addr, data)
+
+	#Group initRegisterArray into runs of consecutive registers, bank selects stay on their own
+	def initRegisterBlocks(self):
+		blocks=[]
+		for addr,value in self.initRegisterArray:
+			if (blocks and addr!=self.PAJ7620_REGITER_BANK_SEL and blocks[-1][0]!=self.PAJ7620_REGITER_BANK_SEL
+					and blocks[-1][0]+len(blocks[-1][1])==addr and len(blocks[-1][1])<self.I2C_BLOCK_SIZE):
+				blocks[-1][1].append(value)
+			else:
+				blocks.append((addr,[value]))
+		return blocks
+
+	#Read both gesture flag registers (0x43, 0x44) in one transfer, reading clears them
+	def readFlags(self):
+		return self.paj7620ReadReg(self.PAJ7620_ADDR_GES_PS_DET_FLAG_0, 2)
+
 	#Select a register bank on the Gesture Sensor
 	def paj7620SelectBank(self,bank):
 		if bank==self.BANK0:
@@ -523,6 +550,99 @@ class gesture:
 				return 9
 		return 0
 
+# Decodes gestures in a background thread and puts (timestamp, gesture) tuples on .events
+# Without irq_pin the flags are polled every poll_interval, with it the thread waits for
+# the sensor INT line (active low) on that GPIO instead, numbered in the mode the
+# application set with GPIO.setmode (BCM if none was set).
+class GestureEvents(threading.Thread):
+	IDLE	= 0
+	ENTRY	= 1	# left/right/up/down seen, waiting for forward/backward
+	QUIT	= 2	# forward/backward seen, ignoring the hand leaving
+
+	def __init__(self, sensor, irq_pin=None, poll_interval=0.1, events=None):
+		threading.Thread.__init__(self)
+		self.daemon = True
+		self.sensor = sensor
+		self.irq_pin = irq_pin
+		self.poll_interval = poll_interval
+		self.events = events if events is not None else queue.Queue()
+		self.state = self.IDLE
+		self.pending = None
+		self.deadline = 0
+		self._stop_event = threading.Event()
+
+	def run(self):
+		if self.irq_pin is not None:
+			if GPIO.getmode() is None:
+				GPIO.setmode(GPIO.BCM)
+			GPIO.setup(self.irq_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+
+		while not self._stop_event.is_set():
+			self.wait()
+			data, data1 = self.sensor.readFlags()
+			self.step(time.time(), data, data1)
+
+	def wait(self):
+		timeout = self.poll_interval
+		if self.state != self.IDLE:
+			timeout = max(min(timeout, self.deadline - time.time()), 0)
+		if self.irq_pin is None or self.state != self.IDLE:
+			self._stop_event.wait(timeout)
+		elif GPIO.input(self.irq_pin):
+			GPIO.wait_for_edge(self.irq_pin, GPIO.FALLING, timeout=max(int(timeout * 1000), 1))
+
+	def step(self, now, data, data1):
+		g = self.sensor
+		if self.state == self.QUIT:
+			if now < self.deadline:
+				return
+			self.state = self.IDLE
+
+		if self.state == self.ENTRY:
+			if data & g.GES_FORWARD_FLAG:
+				self.emit(now, g.FORWARD)
+				self.quit(now)
+				return
+			if data & g.GES_BACKWARD_FLAG:
+				self.emit(now, g.BACKWARD)
+				self.quit(now)
+				return
+			if now < self.deadline:
+				return
+			self.emit(self.pending[0], self.pending[1])
+			self.state = self.IDLE
+
+		for flag, gesture in ((g.GES_RIGHT_FLAG, g.RIGHT), (g.GES_LEFT_FLAG, g.LEFT),
+				(g.GES_UP_FLAG, g.UP), (g.GES_DOWN_FLAG, g.DOWN)):
+			if data & flag:
+				self.state = self.ENTRY
+				self.pending = (now, gesture)
+				self.deadline = now + g.GES_ENTRY_TIME
+				return
+
+		if data & g.GES_FORWARD_FLAG:
+			self.emit(now, g.FORWARD)
+			self.quit(now)
+		elif data & g.GES_BACKWARD_FLAG:
+			self.emit(now, g.BACKWARD)
+			self.quit(now)
+		elif data & g.GES_CLOCKWISE_FLAG:
+			self.emit(now, g.CLOCKWISE)
+		elif data & g.GES_COUNT_CLOCKWISE_FLAG:
+			self.emit(now, g.ANTI_CLOCKWISE)
+		elif data1 & g.GES_WAVE_FLAG:
+			self.emit(now, g.WAVE)
+
+	def quit(self, now):
+		self.state = self.QUIT
+		self.deadline = now + self.sensor.GES_QUIT_TIME
+
+	def emit(self, timestamp, gesture):
+		self.events.put((timestamp, gesture))
+
+	def stop(self):
+		self._stop_event.set()
+
 if __name__ == "__main__":
 	g=gesture()
 	g.init()
@@ -3,7 +3,7 @@
 
 import grovepi
 import serial, time, sys
-import re
+import threading
 
 en_debug = False
 
@@ -11,17 +11,182 @@ def debug(in_str):
     if en_debug:
         print(in_str)
 
-patterns=["$GPGGA",
-    "/[0-9]{6}\.[0-9]{2}/", # timestamp hhmmss.ss
-    "/[0-9]{4}.[0-9]{2,/}", # latitude of position
-    "/[NS]",  # North or South
-    "/[0-9]{4}.[0-9]{2}", # longitude of position
-    "/[EW]",  # East or West
-    "/[012]", # GPS Quality Indicator
-    "/[0-9]+", # Number of satellites
-    "/./", # horizontal dilution of precision x.x
-    "/[0-9]+\.[0-9]*/" # altitude x.x
-    ]
+def _float(field):
+    try:
+        return float(field)
+    except ValueError:
+        return None
+
+def _int(field):
+    try:
+        return int(field)
+    except ValueError:
+        return None
+
+def _degrees(value, hemisphere):
+    '''
+    converts NMEA ddmm.mmmm and N/S/E/W to signed decimal degrees
+    '''
+    value = _float(value)
+    if value is None:
+        return None
+    degrees = value // 100 + value % 100 / 60
+    if hemisphere in ("S", "W"):
+        degrees = -degrees
+    return degrees
+
+class GGA(object):
+    '''
+    Fix data. latitude/longitude are signed decimal degrees, lat/lon the raw
+    ddmm.mmmm values. Missing fields are None.
+    '''
+    __slots__ = ("fields", "time", "lat", "NS", "lon", "EW", "latitude", "longitude",
+                 "quality", "satellites", "hdop", "altitude", "received")
+
+    def __init__(self, fields, received):
+        self.fields = fields
+        self.received = received
+        self.time = fields[1]
+        self.lat = _float(fields[2])
+        self.NS = fields[3]
+        self.lon = _float(fields[4])
+        self.EW = fields[5]
+        self.latitude = _degrees(fields[2], fields[3])
+        self.longitude = _degrees(fields[4], fields[5])
+        self.quality = _int(fields[6])
+        self.satellites = _int(fields[7])
+        self.hdop = _float(fields[8])
+        self.altitude = _float(fields[9])
+
+class RMC(object):
+    '''
+    Recommended minimum data, valid is True when the receiver reports status A
+    '''
+    __slots__ = ("fields", "time", "valid", "latitude", "longitude", "speed_knots", "course", "date",
+                 "received")
+
+    def __init__(self, fields, received):
+        self.fields = fields
+        self.received = received
+        self.time = fields[1]
+        self.valid = fields[2] == "A"
+        self.latitude = _degrees(fields[3], fields[4])
+        self.longitude = _degrees(fields[5], fields[6])
+        self.speed_knots = _float(fields[7])
+        self.course = _float(fields[8])
+        self.date = fields[9]
+
+class VTG(object):
+    '''
+    Course and speed over ground
+    '''
+    __slots__ = ("fields", "course_true", "course_magnetic", "speed_knots", "speed_kmh", "received")
+
+    def __init__(self, fields, received):
+        self.fields = fields
+        self.received = received
+        self.course_true = _float(fields[1])
+        self.course_magnetic = _float(fields[3])
+        self.speed_knots = _float(fields[5])
+        self.speed_kmh = _float(fields[7])
+
+class GSA(object):
+    '''
+    Active satellites, fix_type is 1 (no fix), 2 (2D) or 3 (3D)
+    '''
+    __slots__ = ("fields", "mode", "fix_type", "satellites", "pdop", "hdop", "vdop", "received")
+
+    def __init__(self, fields, received):
+        self.fields = fields
+        self.received = received
+        self.mode = fields[1]
+        self.fix_type = _int(fields[2])
+        self.satellites = [int(prn) for prn in fields[3:15] if prn.isdigit()]
+        self.pdop = _float(fields[15])
+        self.hdop = _float(fields[16])
+        self.vdop = _float(fields[17])
+
+class NMEAParser(object):
+    '''
+    Incremental NMEA 0183 parser.
+    feed() takes serial data in chunks of any size, complete sentences with a
+    valid *hh checksum update the latest record of their type: gga, rmc, vtg
+    and gsa, which are replaced whole so other threads can read them at any time.
+    '''
+    RECORDS = {"GGA": (GGA, 15), "RMC": (RMC, 12), "VTG": (VTG, 9), "GSA": (GSA, 18)}
+
+    # longest NMEA sentence is 82 characters, drop runaway data without a line end
+    MAX_SENTENCE = 128
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.gga = None
+        self.rmc = None
+        self.vtg = None
+        self.gsa = None
+        self.sentences = 0
+        self.errors = 0
+
+    def feed(self, data):
+        '''
+        Parses every complete sentence in data, returns the number of records updated
+        '''
+        self.buffer += data
+        updated = 0
+        start = 0
+        while True:
+            end = self.buffer.find(b"\n", start)
+            if end < 0:
+                break
+            if self.parse(self.buffer[start:end]):
+                updated += 1
+            start = end + 1
+        del self.buffer[:start]
+        if len(self.buffer) > self.MAX_SENTENCE:
+            del self.buffer[:-self.MAX_SENTENCE]
+        return updated
+
+    def parse(self, sentence):
+        '''
+        Parses one sentence without line end, returns True if a record was updated
+        '''
+        # sentences can be glued to line noise, start from the last $
+        dollar = sentence.rfind(b"$")
+        star = sentence.rfind(b"*")
+        if dollar < 0 or star < dollar:
+            return False
+        self.sentences += 1
+
+        checksum = 0
+        for byte in sentence[dollar + 1:star]:
+            checksum ^= byte
+        try:
+            valid = int(sentence[star + 1:star + 3].decode("ascii"), 16) == checksum
+        except (ValueError, UnicodeDecodeError):
+            valid = False
+        if not valid:
+            self.errors += 1
+            debug("Failed: checksum")
+            return False
+
+        try:
+            fields = sentence[dollar:star].decode("ascii").split(",")
+        except UnicodeDecodeError:
+            self.errors += 1
+            return False
+
+        # any talker: GP, GN, GL...
+        kind = fields[0][3:]
+        if kind not in self.RECORDS:
+            return False
+        record, length = self.RECORDS[kind]
+        if len(fields) < length:
+            debug("Failed: wrong number of parameters")
+            self.errors += 1
+            return False
+
+        setattr(self, kind.lower(), record(fields, time.time()))
+        return True
 
 class GROVEGPS():
     def __init__(self, port='/dev/ttyAMA0', baud=9600, timeout=0):
@@ -29,11 +194,9 @@ class GROVEGPS():
         self.ser.flush()
         self.raw_line = ""
         self.gga = []
-        self.validation =[] # contains compiled regex
-
-        # compile regex once to use later
-        for i in range(len(patterns)-1):
-            self.validation.append(re.compile(patterns[i]))
+        self.parser = NMEAParser()
+        self.reader = None
+        self._stop_event = threading.Event()
 
         self.clean_data()
         # self.get_date()  # attempt to gete date from GPS.
@@ -44,7 +207,7 @@ class GROVEGPS():
         ensures that all relevant GPS data is set to either empty string
         or -1.0, or -1, depending on appropriate type
         This occurs right after initialisation or
-        after 50 attemps to reach GPS
+        when the GPS has no fix
         '''
         self.timestamp = ""
         self.lat = -1.0    # degrees minutes and decimals of minute
@@ -73,94 +236,78 @@ class GROVEGPS():
     #             print (self.raw_line)
 
 
-    def read(self):
+    def poll(self):
         '''
-        Attempts 50 times at most to get valid data from GPS
-        Returns as soon as valid data is found
-        If valid data is not found, then clean up data in GPS instance
+        Feeds whatever the serial port has buffered to the parser, never waits
         '''
-        valid = False
-        for _ in range(50):
-            time.sleep(0.5)
-            self.raw_line = self.ser.readline()
-            try:
-                self.line = self.raw_line.decode('utf-8')
-                self.line = self.line.strip()
-            except:
-                self.line = ""
-            debug(self.line)
-            if self.validate(self.line):
-                valid = True
-                break
-
-        if valid:
-            return self.gga
-        else:
-            self.clean_data()
-            return []
+        waiting = self.ser.in_waiting if hasattr(self.ser, "in_waiting") else self.ser.inWaiting()
+        if waiting:
+            self.parser.feed(self.ser.read(waiting))
 
-    def validate(self, in_line):
+    def start(self):
         '''
-        Runs regex validation on a GPGAA sentence.
-        Returns False if the sentence is mangled
-        Return True if everything is all right and sets internal
-        class members.
+        Reads the serial port in a background thread, read() then only
+        returns the latest fix
         '''
-        if in_line == "":
-            return False
-        if in_line[:6] != "$GPGGA":
-            return False
+        if self.reader is None:
+            self.reader = threading.Thread(target=self._run)
+            self.reader.daemon = True
+            self.reader.start()
 
-        self.gga = in_line.split(",")
-        debug (self.gga)
+    def stop(self):
+        self._stop_event.set()
+        if self.reader is not None:
+            self.reader.join()
+            self.reader = None
+        self._stop_event.clear()
 
-        #Sometimes multiple GPS data packets come into the stream. Take the data only after the last '$GPGGA' is seen
-        try:
-            ind=self.gga.index('$GPGGA', 5, len(self.gga))
-            self.gga=self.gga[ind:]
-        except ValueError:
-            pass
-
-        if len(self.gga) != 15:
-            debug ("Failed: wrong number of parameters ")
-            debug (self.gga)
-            return False
+    def _run(self):
+        # block in the serial read until data arrives, then drain the buffer
+        self.ser.timeout = 0.1
+        while not self._stop_event.is_set():
+            data = self.ser.read(1)
+            if data:
+                self.parser.feed(data)
+                self.poll()
 
-        for i in range(len(self.validation)-1):
-            if len(self.gga[i]) == 0:
-                debug ("Failed: empty string %d"%i)
-                return False
-            test = self.validation[i].match(self.gga[i])
-            if test == False:
-                debug ("Failed: wrong format on parameter %d"%i)
-                return False
-            else:
-                debug("Passed %d"%i)
+    def latest(self):
+        '''
+        Returns the latest GGA record, or None
+        '''
+        return self.parser.gga
 
-        try:
-            self.timestamp = self.gga[1]
-            self.lat = float(self.gga[2])
-            self.NS = self.gga[3]
-            self.lon = float(self.gga[4])
-            self.EW = self.gga[5]
-            self.quality = int(self.gga[6])
-            self.satellites = int(self.gga[7])
-            self.altitude = float(self.gga[9])
-
-            self.latitude = self.lat // 100 + self.lat % 100 / 60
-            if self.NS == "S":
-                self.latitude = - self.latitude
-            self.longitude = self.lon // 100 + self.lon % 100 / 60
-            if self.EW == "W":
-                self.longitude = -self.longitude
-        except ValueError:
-            debug( "FAILED: invalid value")
+    def read(self):
+        '''
+        Returns the fields of the latest GGA sentence with a position and
+        sets the internal class members, or an empty list if there is no fix.
+        Does not wait for the GPS.
+        '''
+        if self.reader is None:
+            self.poll()
+        gga = self.parser.gga
+        if gga is None or gga.latitude is None or gga.longitude is None:
+            self.clean_data()
+            self.gga = []
+            return []
 
-        return True
+        self.gga = gga.fields
+        debug(self.gga)
+        self.timestamp = gga.time
+        self.lat = gga.lat
+        self.NS = gga.NS
+        self.lon = gga.lon
+        self.EW = gga.EW
+        self.quality = gga.quality if gga.quality is not None else -1
+        self.satellites = gga.satellites if gga.satellites is not None else -1
+        self.altitude = gga.altitude if gga.altitude is not None else -1.0
+        self.latitude = gga.latitude
+        self.longitude = gga.longitude
+        return self.gga
 
 
 if __name__ =="__main__":
     gps = GROVEGPS()
+    gps.start()
     while True:
         time.sleep(1)
         in_data = gps.read()
@@ -0,0 +1,223 @@
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GrovePi/blob/master/LICENSE
+
+# Binary track logger for the Grove GPS.
+#
+# Fixes are stored as fixed-width little endian records (RECORD_DTYPE) in one
+# append-only file per UTC day, track-YYYYMMDD.bin, without any header, so a
+# whole day can be memory-mapped with load_track() and used as a NumPy record
+# array without parsing.
+
+import calendar
+import os
+import time
+
+import numpy
+
+RECORD_DTYPE = numpy.dtype([
+    ("time", "<f8"),       # seconds since the epoch, UTC
+    ("latitude", "<f8"),   # decimal degrees, negative south
+    ("longitude", "<f8"),  # decimal degrees, negative west
+    ("altitude", "<f4"),   # meters, nan if unknown
+    ("speed", "<f4"),      # km/h, nan if unknown
+    ("course", "<f4"),     # degrees, nan if unknown
+    ("hdop", "<f4"),       # nan if unknown
+    ("quality", "u1"),
+    ("satellites", "u1"),
+])
+
+# meters per degree of latitude
+METERS_PER_DEGREE = 6371000.0 * numpy.pi / 180
+
+
+def douglas_peucker(latitude, longitude, tolerance):
+    '''
+    Douglas-Peucker simplification of a track.
+    Returns a boolean mask of the points to keep so no dropped point is
+    further than tolerance meters from the simplified track. The first and
+    last points are always kept.
+    '''
+    n = len(latitude)
+    keep = numpy.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+
+    # local flat projection in meters, good enough for a chunk of track
+    y = numpy.asarray(latitude, dtype=float) * METERS_PER_DEGREE
+    x = numpy.asarray(longitude, dtype=float) * METERS_PER_DEGREE * numpy.cos(numpy.radians(numpy.mean(latitude)))
+
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        px = x[first + 1:last] - x[first]
+        py = y[first + 1:last] - y[first]
+        length = numpy.hypot(dx, dy)
+        if length == 0:
+            distance = numpy.hypot(px, py)
+        else:
+            distance = numpy.abs(px * dy - py * dx) / length
+        i = numpy.argmax(distance)
+        if distance[i] > tolerance:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def track_path(directory, timestamp):
+    return os.path.join(directory, time.strftime("track-%Y%m%d.bin", time.gmtime(timestamp)))
+
+
+def load_track(path):
+    '''
+    Memory-maps a track file as a read-only record array of RECORD_DTYPE.
+    A partial record left by an interrupted write is ignored.
+    '''
+    count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return numpy.zeros(0, dtype=RECORD_DTYPE)
+    return numpy.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+
+def load_day(directory, day):
+    '''
+    Loads the track of a UTC day given as "YYYYMMDD"
+    '''
+    return load_track(os.path.join(directory, "track-%s.bin" % day))
+
+
+def _nan(value):
+    return numpy.nan if value is None else value
+
+
+def _fix_time(gga, rmc):
+    '''
+    UTC time of a fix from the GGA time and the RMC date,
+    or the time it was received if the GPS did not send a date yet
+    '''
+    try:
+        if rmc is not None and rmc.time == gga.time and len(rmc.date) == 6:
+            day = time.strptime(rmc.date, "%d%m%y")
+            seconds = float(gga.time[4:])
+            return calendar.timegm(day[:3] + (int(gga.time[:2]), int(gga.time[2:4]), 0)) + seconds
+    except ValueError:
+        pass
+    return gga.received
+
+
+class TrackRecorder(object):
+    '''
+    Records fixes from a dextergps.GROVEGPS into daily binary track files.
+
+    Fixes closer than min_interval seconds to the last one are dropped.
+    The others are buffered and every chunk_size fixes (or on flush())
+    simplified with Douglas-Peucker to within tolerance meters, keeping at
+    least one fix every max_interval seconds, and appended to the file.
+    '''
+    def __init__(self, directory, gps=None, tolerance=5.0, min_interval=1.0, max_interval=60.0, chunk_size=600):
+        self.directory = directory
+        self.gps = gps
+        self.tolerance = tolerance
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.buffer = numpy.zeros(chunk_size, dtype=RECORD_DTYPE)
+        self.count = 0
+        self.last_time = None
+        self.last_gga = None
+        self.written = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def update(self):
+        '''
+        Adds the latest fix of the GPS if it is new and has a position.
+        Returns True if it was added.
+        '''
+        parser = self.gps.parser
+        gga = parser.gga
+        if gga is None or gga is self.last_gga or gga.latitude is None or gga.longitude is None:
+            return False
+        self.last_gga = gga
+
+        rmc = parser.rmc
+        vtg = parser.vtg
+        speed = vtg.speed_kmh if vtg is not None else None
+        course = vtg.course_true if vtg is not None else None
+        return self.add(_fix_time(gga, rmc), gga.latitude, gga.longitude, gga.altitude,
+                        speed, course, gga.hdop, gga.quality, gga.satellites)
+
+    def add(self, timestamp, latitude, longitude, altitude=None, speed=None, course=None, hdop=None,
+            quality=None, satellites=None):
+        '''
+        Adds one fix, returns False if it was dropped by the time decimation
+        '''
+        if self.last_time is not None and timestamp - self.last_time < self.min_interval:
+            return False
+        # a new day starts a new file
+        if self.count and time.gmtime(timestamp)[:3] != time.gmtime(self.buffer["time"][0])[:3]:
+            self.flush()
+
+        self.buffer[self.count] = (timestamp, latitude, longitude, _nan(altitude), _nan(speed), _nan(course),
+                                   _nan(hdop), quality or 0, satellites or 0)
+        self.count += 1
+        self.last_time = timestamp
+
+        if self.count == len(self.buffer):
+            self.flush()
+        return True
+
+    def flush(self):
+        '''
+        Simplifies the buffered fixes and appends them to the track file
+        '''
+        if self.count == 0:
+            return
+        chunk = self.buffer[:self.count]
+        keep = douglas_peucker(chunk["latitude"], chunk["longitude"], self.tolerance)
+
+        # restore fixes so no gap is longer than max_interval
+        kept_time = chunk["time"][0]
+        for i in range(1, self.count):
+            if keep[i]:
+                kept_time = chunk["time"][i]
+            elif chunk["time"][i + 1 if i + 1 < self.count else i] - kept_time > self.max_interval:
+                keep[i] = True
+                kept_time = chunk["time"][i]
+
+        records = chunk[keep]
+        path = track_path(self.directory, chunk["time"][0])
+        with open(path, "ab") as f:
+            # cut off a partial record left by an interrupted write so the
+            # new records start on a record boundary
+            size = os.path.getsize(path)
+            if size % RECORD_DTYPE.itemsize:
+                f.truncate(size // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize)
+            # one write per chunk
+            f.write(records.tobytes())
+        self.written += len(records)
+        self.count = 0
+
+    def close(self):
+        self.flush()
+
+
+if __name__ == "__main__":
+    import sys
+    import dextergps
+
+    gps = dextergps.GROVEGPS()
+    gps.start()
+    recorder = TrackRecorder(sys.argv[1] if len(sys.argv) > 1 else "tracks", gps)
+    try:
+        while True:
+            recorder.update()
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        recorder.close()
@@ -11,8 +11,10 @@
 # For more information see https://github.com/DexterInd/GrovePi/blob/master/LICENSE
 
 import time,sys
+import threading
 import RPi.GPIO as GPIO
 import smbus
+import numpy
 
 # use the bus that matches your raspi version
 rev = GPIO.RPI_REVISION
@@ -33,17 +35,148 @@ class ADC:
 	REG_ADDR_CONVL  = 0x06
 	REG_ADDR_CONVH  = 0x07
 
-	def __init__(self,address=0x55):
+	#Configuration register bits
+	CONFIG_CYCLE_SHIFT = 5
+	CONFIG_ALERT_HOLD  = 0x10
+	CONFIG_ALERT_FLAG  = 0x08
+	CONFIG_ALERT_PIN   = 0x04
+	CONFIG_POLARITY    = 0x01
+
+	#Approximate conversion rates in samples per second of the automatic
+	#conversion cycle settings, 0 disables automatic conversion
+	CYCLE_RATES = [0, 27000, 13500, 6700, 3400, 1700, 900, 400]
+
+	#Alert status register bits, write them back to clear
+	ALERT_UNDER = 0x01
+	ALERT_OVER  = 0x02
+
+	#The Grove board halves the input and uses a 3.0 V reference
+	VOLTS_PER_COUNT = 3.0 * 2 / 4096
+
+	def __init__(self,address=0x55,cycle=1):
 		self.address=address
-		bus.write_byte_data(self.address, self.REG_ADDR_CONFIG,0x20)
+		self.scale=self.VOLTS_PER_COUNT
+		self.offset=0.0
+		self.config=0
+		self.configure(cycle)
+
+	#Sets the automatic conversion cycle (index into CYCLE_RATES) and the alert behaviour
+	#In automatic mode the chip keeps converting and tracks the lowest and highest result
+	def configure(self,cycle=1,alert_flag=False,alert_pin=False,alert_hold=False,active_high=False):
+		config=cycle<<self.CONFIG_CYCLE_SHIFT
+		if alert_hold:
+			config|=self.CONFIG_ALERT_HOLD
+		if alert_flag:
+			config|=self.CONFIG_ALERT_FLAG
+		if alert_pin:
+			config|=self.CONFIG_ALERT_PIN
+		if active_high:
+			config|=self.CONFIG_POLARITY
+		bus.write_byte_data(self.address, self.REG_ADDR_CONFIG,config)
+		self.config=config
+
+	def read_register(self,register):
+		data=bus.read_i2c_block_data(self.address, register, 2)
+		return (data[0]&0x0f)<<8 | data[1]
+
+	def write_register(self,register,value):
+		bus.write_i2c_block_data(self.address, register, [(value>>8)&0x0f, value&0xff])
 
 	def adc_read(self):
-		data=bus.read_i2c_block_data(self.address, self.REG_ADDR_RESULT, 2)
-		raw_val=(data[0]&0x0f)<<8 | data[1]
-		return raw_val
+		return self.read_register(self.REG_ADDR_RESULT)
+
+	#Returns (lowest, highest, result) raw values
+	#The chip does not auto-increment its register pointer so these are three
+	#transfers.  With reset the lowest and highest registers start over afterwards
+	def read_block(self,reset=True):
+		lowest=self.read_register(self.REG_ADDR_CONVL)
+		highest=self.read_register(self.REG_ADDR_CONVH)
+		result=self.read_register(self.REG_ADDR_RESULT)
+		if reset:
+			self.reset_min_max()
+		return lowest,highest,result
+
+	#Any write sets the lowest conversion to 0xfff and the highest to 0
+	def reset_min_max(self):
+		self.write_register(self.REG_ADDR_CONVL,0x0fff)
+		self.write_register(self.REG_ADDR_CONVH,0)
+
+	#Converts raw counts (a number or a numpy array) to volts
+	def volts(self,raw):
+		return raw*self.scale+self.offset
+
+	#Sets scale and offset from two known inputs: raw readings raw1, raw2 for volts1, volts2
+	def calibrate(self,raw1,volts1,raw2,volts2):
+		self.scale=float(volts2-volts1)/(raw2-raw1)
+		self.offset=volts1-raw1*self.scale
+
+	#Alert threshold mode: the alert is raised below low or above high (raw counts) and
+	#released once the value is back inside the limits by hysteresis counts
+	#Needs automatic conversion, the current cycle is kept (or set to 1 if disabled)
+	def set_alert(self,low,high,hysteresis=0,pin=True,hold=False,active_high=False):
+		self.write_register(self.REG_ADDR_LIMITL,low)
+		self.write_register(self.REG_ADDR_LIMITH,high)
+		self.write_register(self.REG_ADDR_HYST,hysteresis)
+		cycle=(self.config>>self.CONFIG_CYCLE_SHIFT) or 1
+		self.configure(cycle,alert_flag=True,alert_pin=pin,alert_hold=hold,active_high=active_high)
+
+	#Returns the alert status bits (ALERT_UNDER, ALERT_OVER) and clears them
+	def read_alert(self):
+		status=bus.read_byte_data(self.address, self.REG_ADDR_ALERT)&0x03
+		if status:
+			bus.write_byte_data(self.address, self.REG_ADDR_ALERT, status)
+		return status
+
+# Samples an ADC in a background thread every interval seconds while the chip
+# converts on its own in cycle mode.  The last capacity passes are kept in
+# preallocated ring buffers: .times and .volts with one row of (lowest, highest,
+# result) per pass, so the envelope between passes is kept without reading every
+# conversion.  .count is the number of passes stored so far, failed reads are
+# counted in .errors.
+class ADCSampler(threading.Thread):
+	def __init__(self, adc, interval=0.01, capacity=6000):
+		threading.Thread.__init__(self)
+		self.daemon = True
+		self.adc = adc
+		self.interval = interval
+		self.capacity = capacity
+		self.times = numpy.zeros(capacity)
+		self.volts = numpy.zeros((capacity, 3))
+		self.count = 0
+		self.errors = 0
+		self._stop_event = threading.Event()
+
+	def run(self):
+		self.adc.reset_min_max()
+		next_time = time.time()
+		while not self._stop_event.is_set():
+			try:
+				raw = self.adc.read_block()
+			except IOError:
+				self.errors += 1
+			else:
+				i = self.count % self.capacity
+				self.volts[i] = self.adc.volts(numpy.array(raw))
+				self.times[i] = time.time()
+				self.count += 1
+			next_time += self.interval
+			self._stop_event.wait(max(next_time - time.time(), 0))
+
+	def latest(self, n=1):
+		"Returns (times, volts) of the last n passes, oldest first"
+		n = min(n, self.count, self.capacity)
+		index = numpy.arange(self.count - n, self.count) % self.capacity
+		return self.times[index], self.volts[index]
+
+	def stop(self):
+		self._stop_event.set()
 
 if __name__ == "__main__":
 	adc= ADC()
+	sampler= ADCSampler(adc)
+	sampler.start()
 	while True:
-		print(adc.adc_read())
 		time.sleep(.5)
+		times,volts= sampler.latest(50)
+		if len(times):
+			print("%.3f V (min %.3f V, max %.3f V)" % (volts[-1,2], volts[:,0].min(), volts[:,1].max()))
@@ -39,7 +39,18 @@ import time
 # You can initialize with a different address too: grove_i2c_adc.ADC(address=0x56)
 adc= grove_i2c_adc.ADC()
 
-while True:
+#Read the result register on demand
+for i in range(5):
 	#Print the 12 bit value from the I2C ADC
 	print(adc.adc_read())
-	time.sleep(.5)
\ No newline at end of file
+	time.sleep(.5)
+
+#Let the ADC convert continuously and sample it at 100 Hz in the background,
+#each pass keeps the lowest and highest conversion since the previous one
+sampler= grove_i2c_adc.ADCSampler(adc, interval=0.01)
+sampler.start()
+while True:
+	time.sleep(.5)
+	times,volts= sampler.latest(50)
+	if len(times):
+		print("%.3f V (min %.3f V, max %.3f V)" % (volts[-1,2], volts[:,0].min(), volts[:,1].max()))
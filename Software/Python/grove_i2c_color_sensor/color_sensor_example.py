@@ -23,6 +23,15 @@ if color_sensor.is_integration_complete():
 else:
     print("Continuous integration incomplete")
 
+# Classify the next 10 measures, taken back-to-back at the integration rate
+samples = []
+for timestamp, rgbc in color_sensor.stream():
+    samples.append(rgbc)
+    if len(samples) == 10:
+        break
+indexes = grove_i2c_color_sensor.xy_to_color_index(grove_i2c_color_sensor.rgbc_to_xy(samples))
+print("Streamed colors: {}".format([grove_i2c_color_sensor.COLOR_NAMES[i] if i >= 0 else None for i in indexes]))
+
 # Stop integration before changing settings
 color_sensor.stop_integration()
 
@@ -1,6 +1,6 @@
 import smbus
 import time
-import math
+import numpy
 import RPi.GPIO
 
 # Released under the MIT license (http://choosealicense.com/licenses/mit/).
@@ -167,6 +167,7 @@ class GroveI2CColorSensor:
         self.bus.write_i2c_block_data(self._I2C_SENSOR_ADDRESS,
                                       self._REGISTER_TIMING,
                                       [self._TIMING_INTEGRATION_MODE_CONTINUOUS | integration_time_reg])
+        self.integration_time = integration_time_in_ms / 1000.0
         time.sleep(self._SLEEP_VALUE)
 
     def use_manual_integration(self):
@@ -177,6 +178,7 @@ class GroveI2CColorSensor:
         self.bus.write_i2c_block_data(self._I2C_SENSOR_ADDRESS,
                                       self._REGISTER_TIMING,
                                       [self._TIMING_INTEGRATION_MODE_MANUAL])
+        self.integration_time = None
         time.sleep(self._SLEEP_VALUE)
 
     def set_gain_and_prescaler(self, gain_multiplier=1, prescaler_divider=1):
@@ -295,32 +297,113 @@ class GroveI2CColorSensor:
 
         :return: a (x, y) tuple
         """
-        rgbc = self.read_rgbc_word()
-        x_bar = -0.14282 * rgbc[0] + 1.54924 * rgbc[1] + -0.95641 * rgbc[2]
-        y_bar = -0.32466 * rgbc[0] + 1.57837 * rgbc[1] + -0.73191 * rgbc[2]
-        z_bar = -0.68202 * rgbc[0] + 0.77073 * rgbc[1] + 0.563320 * rgbc[2]
-
-        x = x_bar / (x_bar + y_bar + z_bar)
-        y = y_bar / (x_bar + y_bar + z_bar)
-
-        return [x, y]
+        return list(rgbc_to_xy(self.read_rgbc_word()))
 
     def read_color_name(self):
         """ Reads the measured color and maps it to the nearest color present in COLOR_TABLE.
 
         Warning: current implementation does not work well with white / grey / black or dark colors.
 
-        :return: The color name used as a key in COLOR_TABLE.
+        :return: The color name used as a key in COLOR_TABLE, or None if no color is close enough.
+        """
+        index = xy_to_color_index(rgbc_to_xy(self.read_rgbc_word()))
+        if index < 0:
+            return None
+        return COLOR_NAMES[index]
+
+    def stream(self):
+        """ Yields every measure of a running continuous integration, back-to-back.
+
+        Sleeps until the expected end of each integration cycle, then polls the ADC valid bit, so samples come at
+        the sensor integration rate. Use use_continuous_integration() and start_integration() first. Collect the
+        samples into an array and use rgbc_to_xy() and xy_to_color_index() to classify them in bulk.
+
+        :return: a generator of (timestamp, (r,g,b,c)) tuples of word values
         """
-        xy = self.read_xy()
-        closest_color = None
-        closest_distance = 1
-        for current_color in self.COLOR_TABLE:
-            current_coordinates = self.COLOR_TABLE[current_color]
-            current_dist = math.sqrt(
-                    (current_coordinates["y"] - xy[1])**2 + (current_coordinates["x"] - xy[0])**2)
-            if current_dist < closest_distance:
-                closest_color = current_color
-                closest_distance = current_dist
-
-        return closest_color
+        assert self.integration_time is not None, "Streaming requires continuous integration"
+
+        deadline = time.time() + self.integration_time
+        while True:
+            delay = deadline - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            while not self.is_integration_complete():
+                time.sleep(0.001)
+            timestamp = time.time()
+            yield timestamp, self.read_rgbc_word()
+            deadline = timestamp + self.integration_time
+
+
+# Colors in COLOR_TABLE, indexed by xy_to_color_index()
+COLOR_NAMES = sorted(GroveI2CColorSensor.COLOR_TABLE)
+_COLOR_XY = numpy.array([[GroveI2CColorSensor.COLOR_TABLE[name]["x"], GroveI2CColorSensor.COLOR_TABLE[name]["y"]]
+                         for name in COLOR_NAMES])
+
+# RGB to CIE XYZ, see http://www.techmind.org/colour/
+_RGB_TO_XYZ = numpy.array([[-0.14282, 1.54924, -0.95641],
+                           [-0.32466, 1.57837, -0.73191],
+                           [-0.68202, 0.77073, 0.563320]])
+
+# Nearest color of each cell of a quantized xy grid covering [0, 1] x [0, 1], built on the first classification.
+_GRID_SIZE = 512
+_COLOR_GRID = None
+
+
+def _color_grid():
+    global _COLOR_GRID
+    if _COLOR_GRID is None:
+        centers = ((numpy.arange(_GRID_SIZE) + 0.5) / _GRID_SIZE).astype(numpy.float32)
+        colors = _COLOR_XY.astype(numpy.float32)
+        dy = (centers[:, None] - colors[:, 1]) ** 2
+        margin = numpy.float32(numpy.sqrt(2.0) / _GRID_SIZE)
+        grid = numpy.empty((_GRID_SIZE, _GRID_SIZE), dtype=numpy.int8)
+        # One row of x at a time, only a (_GRID_SIZE, colors) distance array is held
+        for i in range(_GRID_SIZE):
+            distances = numpy.sqrt((centers[i] - colors[:, 0]) ** 2 + dy)
+            grid[i] = numpy.argmin(distances, axis=-1)
+
+            # Cells whose nearest color could change within the cell are marked -1 and searched exhaustively
+            nearest = numpy.partition(distances, 1, axis=-1)
+            grid[i][nearest[:, 1] - nearest[:, 0] <= margin] = -1
+        _COLOR_GRID = grid
+    return _COLOR_GRID
+
+
+def rgbc_to_xy(rgbc):
+    """ Converts (r,g,b,c) word values to CIE x,y coordinates.
+
+    See http://www.techmind.org/colour/ and https://en.wikipedia.org/wiki/CIE_1931_color_space for more information.
+
+    :param rgbc: a (r,g,b,c) tuple as returned by read_rgbc_word(), or an array of shape (n, 4) of them.
+    :return: a (x, y) array, or an array of shape (n, 2). Black samples give nan.
+    """
+    rgbc = numpy.asarray(rgbc, dtype=float)
+    xyz = numpy.dot(rgbc[..., :3], _RGB_TO_XYZ.T)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        return xyz[..., :2] / xyz.sum(axis=-1)[..., None]
+
+
+def xy_to_color_index(xy):
+    """ Maps CIE x,y coordinates to the nearest color of COLOR_TABLE using the precomputed grid.
+
+    :param xy: a (x, y) pair or an array of shape (n, 2).
+    :return: the index in COLOR_NAMES, or -1 when no color is closer than 1 (e.g. black samples), as an int or an
+    array of shape (n,).
+    """
+    xy = numpy.asarray(xy, dtype=float)
+    points = xy.reshape(-1, 2)
+    valid = numpy.isfinite(points).all(axis=-1)
+    cells = numpy.clip(numpy.where(valid[:, None], points, 0) * _GRID_SIZE, 0, _GRID_SIZE - 1).astype(int)
+    index = _color_grid()[cells[:, 0], cells[:, 1]].astype(int)
+
+    # Points near a boundary between colors or outside the grid are rare, search them exhaustively
+    search = valid & ((index < 0) | ((points < 0) | (points >= 1)).any(axis=-1))
+    if search.any():
+        distances = ((points[search][:, None, :] - _COLOR_XY) ** 2).sum(axis=-1)
+        index[search] = numpy.argmin(distances, axis=-1)
+
+    distance = ((points - _COLOR_XY[index]) ** 2).sum(axis=-1)
+    index = numpy.where(valid & (distance < 1), index, -1)
+    if xy.ndim == 1:
+        return int(index[0])
+    return index.reshape(xy.shape[:-1])
@@ -6,15 +6,21 @@
 #
 # Read http://www.dexterindustries.com/topic/greehouse-project/ for the forum discussion about the sensor
 
-from time import sleep
+from time import sleep, time
 import smbus
+import numpy
 from Adafruit_I2C import Adafruit_I2C
 import RPi.GPIO as GPIO
 from smbus import SMBus
 
 TSL2561_Control = 0x80
 TSL2561_Timing = 0x81
+TSL2561_ThreshLow = 0xA2  # word access to THRESHLOWLOW/THRESHLOWHIGH
+TSL2561_ThreshHigh = 0xA4 # word access to THRESHHIGHLOW/THRESHHIGHHIGH
 TSL2561_Interrupt = 0x86
+TSL2561_Clear = 0xC0      # command byte clearing a pending interrupt
+TSL2561_Channel0 = 0xAC   # word access to both bytes of channel 0
+TSL2561_Channel1 = 0xAE   # word access to both bytes of channel 1
 TSL2561_Channel0L = 0x8C
 TSL2561_Channel0H = 0x8D
 TSL2561_Channel1L = 0x8E
@@ -80,6 +86,18 @@ K8C = 0x029a # 1.3 * 2^RATIO_SCALE
 B8C = 0x0000 # 0.000 * 2^LUX_SCALE
 M8C = 0x0000 # 0.000 * 2^LUX_SCALE
 
+# ratio breakpoints and coefficients of both packages, for computeLux
+K_T = numpy.array([K1T, K2T, K3T, K4T, K5T, K6T, K7T])
+B_T = numpy.array([B1T, B2T, B3T, B4T, B5T, B6T, B7T, B8T])
+M_T = numpy.array([M1T, M2T, M3T, M4T, M5T, M6T, M7T, M8T])
+K_C = numpy.array([K1C, K2C, K3C, K4C, K5C, K6C, K7C])
+B_C = numpy.array([B1C, B2C, B3C, B4C, B5C, B6C, B7C, B8C])
+M_C = numpy.array([M1C, M2C, M3C, M4C, M5C, M6C, M7C, M8C])
+
+# integration time in ms and highest valid channel count, indexed by timing
+TIMING_MS = [13.7, 101, 402]
+SATURATION = [5047, 37177, 65535]
+
 # bus parameters
 rev = GPIO.RPI_REVISION
 if rev == 2 or rev == 3:
@@ -228,72 +246,171 @@ def readVisibleLux():
 	return calculateLux(channel0, channel1)
 
 def calculateLux(ch0, ch1):
-	chScale = 0
+	# scale the channel values
+	global schannel0, schannel1
+	schannel0, schannel1, lux = computeLux(ch0, ch1, timing, gain, packageType, scaled=True)
+	sleep(cooldown_time)
+	if debug:
+		print("TSL2561.calculateLux: %i" % lux)
+
+	return lux
+
+def computeLux(ch0, ch1, timing, gain, packageType=0, scaled=False):
+	"""Datasheet integer lux calculation for raw channel counts.
+
+	ch0 and ch1 can be numbers or NumPy arrays of counts taken with the same
+	timing and gain.  With scaled, returns (schannel0, schannel1, lux).
+	"""
 	if timing == 0:   # 13.7 msec
 		chScale = CHSCALE_TINT0
 	elif timing == 1: # 101 msec
-		chScale = CHSCALE_TINT1;
+		chScale = CHSCALE_TINT1
 	else:           # assume no scaling
 		chScale = (1 << CH_SCALE)
 
 	if gain == 0:
 		chScale = chScale << 4 # scale 1X to 16X
 
-	# scale the channel values
-	global schannel0, schannel1
-	schannel0 = (ch0 * chScale) >> CH_SCALE
-	schannel1 = (ch1 * chScale) >> CH_SCALE
+	scalar = numpy.ndim(ch0) == 0 and numpy.ndim(ch1) == 0
+	s0 = (numpy.asarray(ch0, dtype=numpy.int64) * chScale) >> CH_SCALE
+	s1 = (numpy.asarray(ch1, dtype=numpy.int64) * chScale) >> CH_SCALE
 
-	ratio = 0
-	if schannel0 != 0:
-		ratio = (schannel1 << (RATIO_SCALE+1)) / schannel0
+	ratio = numpy.where(s0 != 0, (s1 << (RATIO_SCALE+1)) // numpy.maximum(s0, 1), 0)
 	ratio = (ratio + 1) >> 1
 
 	if packageType == 0: # T package
-		if ((ratio >= 0) and (ratio <= K1T)):
-			b=B1T; m=M1T;
-		elif (ratio <= K2T):
-			b=B2T; m=M2T;
-		elif (ratio <= K3T):
-			b=B3T; m=M3T;
-		elif (ratio <= K4T):
-			b=B4T; m=M4T;
-		elif (ratio <= K5T):
-			b=B5T; m=M5T;
-		elif (ratio <= K6T):
-			b=B6T; m=M6T;
-		elif (ratio <= K7T):
-			b=B7T; m=M7T;
-		elif (ratio > K8T):
-			b=B8T; m=M8T;
-	elif packageType == 1: # CS package
-		if ((ratio >= 0) and (ratio <= K1C)):
-			b=B1C; m=M1C;
-		elif (ratio <= K2C):
-			b=B2C; m=M2C;
-		elif (ratio <= K3C):
-			b=B3C; m=M3C;
-		elif (ratio <= K4C):
-			b=B4C; m=M4C;
-		elif (ratio <= K5C):
-			b=B5C; m=M5C;
-		elif (ratio <= K6C):
-			b=B6C; m=M6C;
-		elif (ratio <= K7C):
-			b=B7C; m=M7C;
-
-	temp = ((schannel0*b)-(schannel1*m))
-	if temp < 0:
-		temp = 0;
+		k, b, m = K_T, B_T, M_T
+	else:                # CS package
+		k, b, m = K_C, B_C, M_C
+	segment = numpy.searchsorted(k, ratio)
+
+	temp = numpy.maximum((s0*b[segment])-(s1*m[segment]), 0)
 	temp += (1<<(LUX_SCALE-1))
 	# strip off fractional portion
 	lux = temp>>LUX_SCALE
-	sleep(cooldown_time)
-	if debug:
-		print("TSL2561.calculateLux: %i" % lux)
 
+	if scalar:
+		s0, s1, lux = int(s0), int(s1), int(lux)
+	if scaled:
+		return s0, s1, lux
 	return lux
 
+class TSL2561:
+	"""TSL2561 that stays powered up and adapts gain and integration time.
+
+	The setting that gave a good reading is kept and the counts predict the
+	next one, so a reading costs one integration period and two word reads.
+	"""
+
+	# (timing, gain) from least to most sensitive
+	SETTINGS = [(0, 0), (1, 0), (0, 1), (2, 0), (1, 1), (2, 1)]
+
+	def __init__(self, address=TSL2561_Address, packageType=0, setting=3, target=0.5):
+		self.i2c = Adafruit_I2C(address)
+		self.packageType = packageType
+		# aim for counts at this fraction of saturation
+		self.target = target
+		self.channel0 = 0
+		self.channel1 = 0
+
+		self.i2c.write8(TSL2561_Control, 0x03)
+		self.i2c.write8(TSL2561_Interrupt, 0x00)
+		self.setSetting(setting)
+
+	def setSetting(self, setting):
+		"Select an entry of SETTINGS, the next reading waits for a full integration"
+		self.setting = setting
+		self.timing, self.gain = self.SETTINGS[setting]
+		self.i2c.write8(TSL2561_Timing, self.timing | self.gain << 4)
+		self.ready = time() + (TIMING_MS[self.timing] + 1) / 1000.0
+
+	def sensitivity(self, setting):
+		timing, gain = self.SETTINGS[setting]
+		return TIMING_MS[timing] * (16 if gain else 1)
+
+	def readChannels(self):
+		"Reads (visible+IR, IR) counts with one word read per channel"
+		delay = self.ready - time()
+		if delay > 0:
+			sleep(delay)
+		self.channel0 = self.i2c.readU16(TSL2561_Channel0)
+		self.channel1 = self.i2c.readU16(TSL2561_Channel1)
+		self.ready = time() + TIMING_MS[self.timing] / 1000.0
+		return self.channel0, self.channel1
+
+	def saturated(self):
+		return max(self.channel0, self.channel1) >= SATURATION[self.timing]
+
+	def predictSetting(self):
+		"The most sensitive setting expected to stay below target for the last counts"
+		if self.saturated():
+			return max(self.setting - 2, 0)
+		counts = max(self.channel0, self.channel1, 1)
+		best = 0
+		for setting in range(len(self.SETTINGS)):
+			timing = self.SETTINGS[setting][0]
+			expected = counts * self.sensitivity(setting) / self.sensitivity(self.setting)
+			if expected < SATURATION[timing] * self.target:
+				best = setting
+		return best
+
+	def readVisibleLux(self):
+		"Lux from the current setting, re-measuring only when the reading was saturated"
+		for attempt in range(len(self.SETTINGS)):
+			self.readChannels()
+			saturated = self.saturated()
+			lux = -1 if saturated else computeLux(self.channel0, self.channel1, self.timing, self.gain, self.packageType)
+
+			setting = self.predictSetting()
+			if setting != self.setting:
+				self.setSetting(setting)
+			if not saturated or setting == self.setting == 0:
+				return lux
+		return lux
+
+	def setThresholds(self, low, high, persist=1):
+		"""Raise the interrupt when channel 0 leaves [low, high] for persist periods.
+
+		The INT pin is active low and level triggered, clear it with clearInterrupt.
+		"""
+		self.i2c.write16(TSL2561_ThreshLow, low)
+		self.i2c.write16(TSL2561_ThreshHigh, high)
+		self.i2c.write8(TSL2561_Interrupt, 0x10 | persist)
+		self.clearInterrupt()
+
+	def disableInterrupt(self):
+		self.i2c.write8(TSL2561_Interrupt, 0x00)
+
+	def clearInterrupt(self):
+		self.i2c.writeRaw8(TSL2561_Clear)
+
+	def waitForChange(self, irq_pin, margin=0.1, timeout=None):
+		"""Block until channel 0 moves more than margin from the last reading, then read lux.
+
+		irq_pin is the GPIO wired to INT, numbered in the mode the application
+		set with GPIO.setmode (BCM if none was set).  Returns None on timeout.
+		"""
+		low = int(self.channel0 * (1 - margin))
+		high = min(int(self.channel0 * (1 + margin)) + 1, 0xFFFF)
+		self.setThresholds(low, high)
+
+		if GPIO.getmode() is None:
+			GPIO.setmode(GPIO.BCM)
+		GPIO.setup(irq_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+		if GPIO.input(irq_pin):
+			kwargs = {} if timeout is None else {"timeout": int(timeout * 1000)}
+			if GPIO.wait_for_edge(irq_pin, GPIO.FALLING, **kwargs) is None:
+				self.disableInterrupt()
+				return None
+		self.disableInterrupt()
+		self.clearInterrupt()
+		# the reading that crossed the threshold is ready now
+		self.ready = time()
+		return self.readVisibleLux()
+
+	def powerDown(self):
+		self.i2c.write8(TSL2561_Control, 0x00)
+
 def init():
 	powerUp()
 	setTintAndGain()
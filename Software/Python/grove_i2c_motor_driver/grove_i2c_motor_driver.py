@@ -11,6 +11,7 @@
 # For more information see https://github.com/DexterInd/GrovePi/blob/master/LICENSE
 
 import time,sys
+import threading
 import RPi.GPIO as GPIO
 import smbus
 
@@ -34,8 +35,19 @@ class motor_driver:
 	Stepernu                  = 0x1c
 	I2CMotorDriverAdd         = 0x0f  #Set the address of the I2CMotorDriver
 
-	def __init__(self,address=0x0f):
+	#The controller needs command_gap seconds between two commands
+	def __init__(self,address=0x0f,command_gap=.02):
 		self.I2CMotorDriverAdd=address
+		self.command_gap=command_gap
+		self.last_command=0
+		self.pending={}			#command -> data, later updates replace earlier ones until sent
+		self.sent={}			#command -> data last written
+		self.lock=threading.RLock()
+		self.wakeup=threading.Event()
+		self.pipeline=None
+		self.running=False
+		self.errors=0			#bus errors seen by the pipeline
+		self.max_errors=25		#consecutive bus errors before the pipeline stops the motors and gives up
 
 	#Maps speed from 0-100 to 0-255
 	def map_vals(self,value, leftMin, leftMax, rightMin, rightMax):
@@ -50,17 +62,111 @@ class motor_driver:
 		# Convert the 0-1 range into a value in the right range.
 		return int(rightMin + (valueScaled * rightSpan))
 
+	#Write a command, waiting only for what is left of the gap since the previous one
+	def write_command(self,command,data):
+		with self.lock:
+			wait=self.last_command+self.command_gap-time.time()
+			if wait>0:
+				time.sleep(wait)
+			bus.write_i2c_block_data(self.I2CMotorDriverAdd, command, data)
+			self.last_command=time.time()
+			self.sent[command]=data
+			self.pending.pop(command,None)
+
 	#Set motor speed
 	def MotorSpeedSetAB(self,MotorSpeedA,MotorSpeedB):
 		MotorSpeedA=self.map_vals(MotorSpeedA,0,100,0,255)
 		MotorSpeedB=self.map_vals(MotorSpeedB,0,100,0,255)
-		bus.write_i2c_block_data(self.I2CMotorDriverAdd, self.MotorSpeedSet, [MotorSpeedA,MotorSpeedB])
-		time.sleep(.02)
+		self.write_command(self.MotorSpeedSet, [MotorSpeedA,MotorSpeedB])
 
 	#Set motor direction
 	def MotorDirectionSet(self,Direction):
-		bus.write_i2c_block_data(self.I2CMotorDriverAdd, self.DirectionSet, [Direction,0])
-		time.sleep(.02)
+		self.write_command(self.DirectionSet, [Direction,0])
+
+	#Queue a command without waiting, replacing any unsent data for the same command
+	#Commands that would not change anything are dropped
+	def queue_command(self,command,data):
+		with self.lock:
+			if self.sent.get(command)==data:
+				self.pending.pop(command,None)
+			else:
+				self.pending[command]=data
+		self.wakeup.set()
+
+	#Non-blocking versions of MotorSpeedSetAB and MotorDirectionSet
+	def queueSpeedAB(self,MotorSpeedA,MotorSpeedB):
+		self.queue_command(self.MotorSpeedSet, [self.map_vals(MotorSpeedA,0,100,0,255),self.map_vals(MotorSpeedB,0,100,0,255)])
+
+	def queueDirection(self,Direction):
+		self.queue_command(self.DirectionSet, [Direction,0])
+
+	#Set both motors with signed speeds from -100 to 100, negative is reverse, without waiting
+	def setMotors(self,MotorSpeedA,MotorSpeedB):
+		Direction=(0b10 if MotorSpeedA>=0 else 0b01) | (0b10 if MotorSpeedB>=0 else 0b01)<<2
+		self.queueDirection(Direction)
+		self.queueSpeedAB(min(abs(MotorSpeedA),100),min(abs(MotorSpeedB),100))
+
+	#Send the queued commands, direction before speed
+	#With block=False only sends what the gap allows and returns the seconds until
+	#the next queued command can go out, 0 when nothing is left
+	def flush(self,block=True):
+		with self.lock:
+			for command in (self.DirectionSet,self.MotorSpeedSet):
+				if command not in self.pending:
+					continue
+				wait=self.last_command+self.command_gap-time.time()
+				if wait>0 and not block:
+					return wait
+				self.write_command(command,self.pending[command])
+			return 0
+
+	#Send queued commands from a background thread as soon as the gap allows
+	#so a control loop can call setMotors at any rate without blocking
+	def start(self):
+		if self.pipeline is None:
+			self.running=True
+			self.pipeline=threading.Thread(target=self.run_pipeline)
+			self.pipeline.daemon=True
+			self.pipeline.start()
+
+	def stop(self):
+		self.running=False
+		self.wakeup.set()
+		pipeline=self.pipeline
+		if pipeline is not None:
+			pipeline.join()
+			self.pipeline=None
+
+	#Failed commands stay pending and are retried after the gap, the controller
+	#NACKs now and then.  After max_errors failures in a row the motors are
+	#stopped and the pipeline ends, start() can be called again
+	def run_pipeline(self):
+		failures=0
+		try:
+			while self.running:
+				self.wakeup.clear()
+				try:
+					wait=self.flush(block=False)
+					failures=0
+				except IOError:
+					self.errors+=1
+					failures+=1
+					if failures>=self.max_errors:
+						with self.lock:
+							self.pending={}
+						try:
+							self.MotorSpeedSetAB(0,0)
+						except IOError:
+							pass
+						break
+					wait=self.command_gap
+				if wait>0:
+					time.sleep(wait)
+				else:
+					self.wakeup.wait()
+		finally:
+			self.running=False
+			self.pipeline=None
 
 if __name__ == "__main__":
 	m= motor_driver()
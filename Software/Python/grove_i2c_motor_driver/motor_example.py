@@ -70,6 +70,17 @@ try:
 		
 	print("Stop")
 	m.MotorSpeedSetAB(0,0)	
+
+	#Steer at 50 Hz without waiting on the motor driver, the background
+	#pipeline only sends the latest speed and direction when the driver is ready
+	print("Steering")
+	m.start()
+	for i in range(200):
+		m.setMotors(60+i//5,60-i//2)	#signed speeds, negative is reverse
+		time.sleep(.02)
+	m.setMotors(0,0)
+	m.stop()
+	m.flush()
 	
 except IOError:
 	print("Unable to find the motor driver, check the addrees and press reset on the motor driver and try again")
@@ -2,84 +2,172 @@
 #NOTE:
 # This sensor is on port 0x04, so not compatible with grovepi unless you load an alternate firmware
 # This is work in progress, would need logic analyzer and arduino to get working
-# Error:
-#   Traceback (most recent call last):
-#  File "multichannel_gas_sensor.py", line 67, in <module>
-#    m= MutichannelGasSensor()
-#  File "multichannel_gas_sensor.py", line 21, in __init__
-#    if self.readR0() >= 0:
-#  File "multichannel_gas_sensor.py", line 27, in readR0
-#    rtnData = self.readData(0x11)
-#  File "multichannel_gas_sensor.py", line 52, in readData
-#    buffer=bus.read_i2c_block_data(self.address, cmd, 4)
-#IOError: [Errno 5] Input/output error
+# The firmware answers a command byte with a 4 byte frame after about 2 ms, so the
+# frame is read with a plain read instead of an smbus register read, which sends the
+# command and reads back immediately (the IOError this driver used to hit).
 #
 # LINKS
 # http://www.seeedstudio.com/wiki/Grove_-_Multichannel_Gas_Sensor
 # https://github.com/Seeed-Studio/Mutichannel_Gas_Sensor
 import time,sys
+import threading
 import RPi.GPIO as GPIO
 import smbus
+import numpy
+from i2c_raw import RawI2C
 
 # use the bus that matches your raspi version
 rev = GPIO.RPI_REVISION
 if rev == 2 or rev == 3:
-    bus = smbus.SMBus(1)
+    bus_number = 1
 else:
-    bus = smbus.SMBus(0)
+    bus_number = 0
+bus = smbus.SMBus(bus_number)
+
+# Gas concentration curves from the Seeed library: ppm = factor * (R / R0) ** exponent
+# Channels are the sensor resistances: 0 NH3, 1 CO, 2 NO2
+GASES = ("CO", "NO2", "NH3", "C3H8", "C4H10", "CH4", "H2", "C2H5OH")
+GAS_CHANNEL = numpy.array([1, 2, 0, 0, 0, 1, 1, 1])
+GAS_EXPONENT = numpy.array([-1.179, 1.007, -1.67, -2.518, -2.138, -4.363, -1.8, -1.552])
+GAS_FACTOR = numpy.array([4.385, 1 / 6.855, 1 / 1.47, 570.164, 398.107, 630.957, 0.73, 1.622])
+
+def concentrations(res, res0, out=None):
+    """Converts resistances to ppm of every gas in GASES.
+
+    res is an array of shape (3,) or (n, 3), res0 the (3,) baseline from readR0.
+    Returns an array of shape (8,) or (n, 8), written into out if given.
+    """
+    ratio = numpy.asarray(res, dtype=float) / res0
+    return numpy.multiply(GAS_FACTOR, ratio[..., GAS_CHANNEL] ** GAS_EXPONENT, out=out)
 
 class MutichannelGasSensor:
     address = None
     is_connected = 0
-    res=[0]*3
 
-    def __init__(self,address=0x04):
+    # Commands answering with a resistance frame
+    CMD_READ_R = (0x01, 0x02, 0x03)
+    CMD_READ_R0 = (0x11, 0x12, 0x13)
+    # Time for the firmware to prepare a frame
+    RESPONSE_TIME = 0.002
+
+    def __init__(self,address=0x04,retries=3):
         self.address=address
-        is_connected = 0
+        self.retries=retries
+        self.res0=numpy.zeros(3)
+        self.res=numpy.zeros(3)
+        self.raw = RawI2C(bus_number, self.address)
         if self.readR0() >= 0:
             self.is_connected = 1
-    
+
+    def close(self):
+        "Closes the raw I2C handle"
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     def readR0(self):
-        rtnData = 0
-        
-        rtnData = self.readData(0x11)
-        if(rtnData >= 0):
-            self.res0[0] = rtnData
-        else:
-            return rtnData
-            
-        rtnData = self.readData(0x12)
-        if(rtnData >= 0):
-            self.res0[0] = rtnData
-        else:
-            return rtnData
-            
-        rtnData = self.readData(0x13)
-        if(rtnData >= 0):
-            self.res0[0] = rtnData
-        else:
-            return rtnData
-        return 0    
-        
+        "Reads the baseline resistance of the 3 channels into res0, returns a negative error on failure"
+        return self.readAll(self.CMD_READ_R0, self.res0)
+
+    def readR(self, out=None):
+        "Reads the resistance of the 3 channels into out (default res), returns a negative error on failure"
+        return self.readAll(self.CMD_READ_R, self.res if out is None else out)
+
+    def readAll(self, cmds, out):
+        # out is only updated once every frame of the pass is valid
+        values = [0]*len(cmds)
+        for i in range(len(cmds)):
+            rtnData = self.readData(cmds[i])
+            if rtnData < 0:
+                return rtnData
+            values[i] = rtnData
+        out[:] = values
+        return 0
+
     def readData(self,cmd):
-        timeout = 0
-        buffer=[0]*4
-        checksum = 0
-        rtnData = 0
-        
-        buffer=bus.read_i2c_block_data(self.address, cmd, 4)
-        print(data)
-        
-        checksum = buffer[0] + buffer[1] + buffer[2]
-        if checksum != buffer[3]:
-            return -4
-        rtnData = ((buffer[1] << 8) + buffer[2])
-        
+        "Reads the value answered to cmd, retrying on bad frames. -3: no answer, -4: bad checksum"
+        rtnData = -3
+        for attempt in range(self.retries + 1):
+            try:
+                self.sendI2C(cmd)
+                time.sleep(self.RESPONSE_TIME)
+                buffer = self.raw.read(4)
+            except (IOError, OSError):
+                rtnData = -3
+                continue
+            if len(buffer) != 4:
+                rtnData = -3
+                continue
+
+            checksum = (buffer[0] + buffer[1] + buffer[2]) & 0xFF
+            if checksum != buffer[3]:
+                rtnData = -4
+                continue
+            return ((buffer[1] << 8) + buffer[2])
         return rtnData
-   
+
     def sendI2C(self,cmd):
         bus.write_byte(self.address, cmd)
 
+    def calcGas(self, out=None):
+        "Reads the channels and returns the ppm of every gas in GASES, None on a failed read"
+        if self.readR() < 0:
+            return None
+        return concentrations(self.res, self.res0, out)
+
+
+# Reads a MutichannelGasSensor in a background thread every interval seconds.
+# The last capacity passes are kept in preallocated ring buffers: .times, .res
+# (ohm readings per channel) and .ppm (one column per gas in GASES); .count is the
+# number of passes stored so far.  Failed passes are skipped and counted in .errors.
+class GasSampler(threading.Thread):
+    def __init__(self, sensor, interval=1.0, capacity=3600):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.sensor = sensor
+        self.interval = interval
+        self.capacity = capacity
+        self.times = numpy.zeros(capacity)
+        self.res = numpy.zeros((capacity, 3))
+        self.ppm = numpy.zeros((capacity, len(GASES)))
+        self.count = 0
+        self.errors = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        next_time = time.time()
+        while not self._stop_event.is_set():
+            i = self.count % self.capacity
+            if self.sensor.readR(self.res[i]) < 0:
+                self.errors += 1
+            else:
+                concentrations(self.res[i], self.sensor.res0, self.ppm[i])
+                self.times[i] = time.time()
+                self.count += 1
+            next_time += self.interval
+            self._stop_event.wait(max(next_time - time.time(), 0))
+
+    def latest(self):
+        "Returns (timestamp, ppm array) of the last pass, or None before the first one"
+        if self.count == 0:
+            return None
+        i = (self.count - 1) % self.capacity
+        return self.times[i], self.ppm[i].copy()
+
+    def stop(self):
+        self._stop_event.set()
+
 
-if __name__ == "__main__":		
-	m= MutichannelGasSensor()
\ No newline at end of file
+if __name__ == "__main__":
+    m = MutichannelGasSensor()
+    sampler = GasSampler(m)
+    sampler.start()
+    while True:
+        time.sleep(1)
+        sample = sampler.latest()
+        if sample is not None:
+            print(" ".join("%s: %.2f" % (GASES[i], sample[1][i]) for i in range(len(GASES))))
@@ -48,6 +48,11 @@ SeeedOLED_Inverse_Display_Cmd   =0xA7
 SeeedOLED_Activate_Scroll_Cmd   =0x2F
 SeeedOLED_Dectivate_Scroll_Cmd  =0x2E
 SeeedOLED_Set_Brightness_Cmd    =0x81
+SeeedOLED_Set_Start_Line_Cmd    =0x40
+
+SeeedOLED_Pages                 =8   #8 text rows of 8 pixels
+SeeedOLED_Columns               =16  #16 characters per text row
+I2C_Block_Size                  =32  #max bytes per SMBus block write
 
 Scroll_Left             =0x00
 Scroll_Right            =0x01
@@ -177,6 +182,15 @@ def sendData(byte):
         print("IOError")
         return -1
 
+def sendDataBlock(data):
+    # Send a run of display data using as few I2C block writes as possible
+    try:
+        for i in range(0,len(data),I2C_Block_Size):
+            bus.write_i2c_block_data(address,SeeedOLED_Data_Mode,list(data[i:i+I2C_Block_Size]))
+    except IOError:
+        print("IOError")
+        return -1
+
 def multi_comm(commands):
     for c in commands:
         sendCommand(c)
@@ -248,6 +262,16 @@ def putString(s):
     for i in range(len(s)):
         putChar(s[i])
 
+def renderString(s):
+    # Return the font columns for a string, ready for sendDataBlock()
+    data=[]
+    for C in s:
+        C_add=ord(C)
+        if C_add<32 or C_add>127:     # Ignore non-printable ASCII characters
+            C_add=ord(' ')
+        data.extend(BasicFont[C_add-32])
+    return data
+
 def putNumber(long_num):
 	char_buffer[10]=None
 	i = 0
@@ -313,8 +337,57 @@ def activateScroll():
 def deactivateScroll():
     sendCommand(SeeedOLED_Dectivate_Scroll_Cmd)
 
+def setStartLine(line):
+    # Map RAM row 'line' (0-63) to the top of the screen
+    sendCommand(SeeedOLED_Set_Start_Line_Cmd | (line & 0x3F))
+
 def setNormalDisplay():
     sendCommand(SeeedOLED_Normal_Display_Cmd)
 
 def setInverseDisplay():
     sendCommand(SeeedOLED_Inverse_Display_Cmd)
+
+class ScrollingConsole(object):
+    '''
+    Text console that scrolls by one text row using the display start line.
+
+    Appending a line once the screen is full only redraws the page that
+    scrolled off the top and moves the start line, so each message costs
+    one row of data instead of a full-screen repaint.  The display must be
+    in page addressing mode (see setPageMode).
+    '''
+
+    def __init__(self):
+        self.top=0      # page currently shown on the first text row
+        self.lines=0    # number of rows written since the last clear
+
+    def clear(self):
+        setStartLine(0)
+        blank=[0x00]*(SeeedOLED_Columns*8)
+        for page in range(SeeedOLED_Pages):
+            setTextXY(0,page)
+            sendDataBlock(blank)
+        self.top=0
+        self.lines=0
+
+    def write(self,text):
+        for line in str(text).split('\n'):
+            self.putLine(line)
+
+    def putLine(self,line):
+        line=line[:SeeedOLED_Columns].ljust(SeeedOLED_Columns)
+        if self.lines<SeeedOLED_Pages:
+            page=self.lines
+            self.lines+=1
+            self._drawRow(page,line)
+            return
+
+        # The screen is full: reuse the page at the top and scroll it to the bottom
+        page=self.top
+        self._drawRow(page,line)
+        self.top=(self.top+1)%SeeedOLED_Pages
+        setStartLine(self.top*8)
+
+    def _drawRow(self,page,line):
+        setTextXY(0,page)
+        sendDataBlock(renderString(line))
@@ -22,7 +22,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import collections
 import logging
+import threading
 import time
 
 import I2C
@@ -151,6 +153,12 @@ SI1145_REG_CHIPSTAT                     = 0x30
 # I2C Address
 SI1145_ADDR                             = 0x60
 
+# MEASRATE unit for autonomous mode, in seconds
+SI1145_MEASRATE_UNIT                    = 31.25e-6
+
+# One reading of every channel, see SI1145.sample()
+Sample = collections.namedtuple('Sample', ['timestamp', 'visible', 'ir', 'prox', 'uv'])
+
 class SI1145(object):
         def __init__(self, address=SI1145_ADDR, busnum=I2C.get_default_bus()):
 
@@ -241,11 +249,29 @@ class SI1145(object):
                 self.writeParam(SI1145_PARAM_ALSVISADCMISC, SI1145_PARAM_ALSVISADCMISC_VISRANGE)
 
                 # measurement rate for auto
-                self._device.write8(SI1145_REG_MEASRATE0, 0xFF) # 255 * 31.25uS = 8ms
+                self.setMeasurementRate(0xFF * SI1145_MEASRATE_UNIT) # 255 * 31.25uS = 8ms
 
                 # auto run
                 self._device.write8(SI1145_REG_COMMAND, SI1145_PSALS_AUTO)
 
+        # sets how often the sensor measures all channels by itself, in seconds
+        # (31.25uS to ~2s), the results registers always hold the latest values
+        def setMeasurementRate(self, interval):
+                rate = int(round(interval / SI1145_MEASRATE_UNIT))
+                rate = max(1, min(0xFFFF, rate))
+                self._device.write8(SI1145_REG_MEASRATE0, rate & 0xFF)
+                self._device.write8(SI1145_REG_MEASRATE1, rate >> 8)
+                self.measurement_interval = rate * SI1145_MEASRATE_UNIT
+
+        # reads every channel in one burst from ALSVISDATA0 to UVINDEX1
+        # returns a Sample, uv is the UV index * 100 like readUV()
+        def sample(self):
+                data = self._device.readList(SI1145_REG_ALSVISDATA0, SI1145_REG_UVINDEX1 - SI1145_REG_ALSVISDATA0 + 1)
+                timestamp = time.time()
+                words = [data[i] | (data[i + 1] << 8) for i in range(0, len(data), 2)]
+                # words: visible, IR, PS1, PS2, PS3, UV index
+                return Sample(timestamp, words[0], words[1], words[2], words[5])
+
         # returns the UV index * 100 (divide by 100 to get the index)
         def readUV(self):
                 return self._device.readU16LE(0x2C)
@@ -262,3 +288,26 @@ class SI1145(object):
         def readProx(self):
                 return self._device.readU16LE(0x26)
 
+
+# Reads a SI1145 in a background thread, the latest Sample is in .sample
+# callback, if given, is called with each new Sample from the sampling thread
+class SI1145Sampler(threading.Thread):
+        def __init__(self, sensor, interval=None, callback=None):
+                threading.Thread.__init__(self)
+                self.daemon = True
+                self.sensor = sensor
+                # no point reading faster than the sensor measures
+                self.interval = interval if interval is not None else sensor.measurement_interval
+                self.callback = callback
+                self.sample = None
+                self._stop_event = threading.Event()
+
+        def run(self):
+                while not self._stop_event.is_set():
+                        self.sample = self.sensor.sample()
+                        if self.callback is not None:
+                                self.callback(self.sample)
+                        self._stop_event.wait(self.interval)
+
+        def stop(self):
+                self._stop_event.set()
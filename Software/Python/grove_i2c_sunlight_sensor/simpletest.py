@@ -41,10 +41,11 @@ print('Press Cntrl + Z to stop')
 print('')
 
 while True:
-        vis = sensor.readVisible()
-        IR = sensor.readIR()
-        UV = sensor.readUV()
-        uvIndex = UV / 100.0
+        # read all channels in one go
+        sample = sensor.sample()
+        vis = sample.visible
+        IR = sample.ir
+        uvIndex = sample.uv / 100.0
         print('Vis:             ' + str(vis))
         print('IR:              ' + str(IR))
         print('UV Index:        ' + str(uvIndex))
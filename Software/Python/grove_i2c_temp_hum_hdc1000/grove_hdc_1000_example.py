@@ -41,7 +41,9 @@ hdc = HDC1000()
 hdc.Config()
 
 while 1:
-    print('Temp    : %.2f C' % hdc.Temperature())
-    print('Humidity: %.2f %%' % hdc.Humidity())
+    # One trigger and one 4 byte read for both values
+    temp, humidity = hdc.Read()
+    print('Temp    : %.2f C' % temp)
+    print('Humidity: %.2f %%' % humidity)
     print('-' * 17)
     time.sleep(1)
\ No newline at end of file
@@ -15,58 +15,117 @@
 import smbus
 import RPi.GPIO as GPIO
 import time
+from i2c_raw import RawI2C
 
 rev = GPIO.RPI_REVISION
 if rev == 2 or rev == 3:
-    bus = smbus.SMBus(1)
+    bus_number = 1
 else:
-    bus = smbus.SMBus(0)
+    bus_number = 0
+bus = smbus.SMBus(bus_number)
 
 class HDC1000:
     I2C_ADDR = 0
-    def __init__(self):
+
+    # Registers
+    TEMPERATURE = 0x00
+    HUMIDITY = 0x01
+    CONFIGURATION = 0x02
+
+    # Configuration register MSB
+    CONFIG_HEAT = 0x20
+    CONFIG_MODE_SEQUENCE = 0x10
+    CONFIG_TRES = {14: 0x00, 11: 0x04}
+    CONFIG_HRES = {14: 0x00, 11: 0x01, 8: 0x02}
+
+    # Conversion times in seconds from the datasheet
+    TEMPERATURE_CONVERSION = {14: 0.00635, 11: 0.00365}
+    HUMIDITY_CONVERSION = {14: 0.0065, 11: 0.00385, 8: 0.0025}
+
+    def __init__(self, retries=3):
         self.I2C_ADDR=0x40
+        self.retries = retries
+        self.sequential = False
+        self.temperature_conversion = self.TEMPERATURE_CONVERSION[14]
+        self.humidity_conversion = self.HUMIDITY_CONVERSION[14]
+
+        # smbus can only read after writing a register pointer, which would
+        # start another conversion, so results are read through a raw handle
+        self.raw = RawI2C(bus_number, self.I2C_ADDR)
+
+    def close(self):
+        "Close the raw I2C handle"
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
-    def Config(self):
+    def Config(self, sequential=True, temperatureResolution=14, humidityResolution=14, heater=True):
         # HDC1000 address, 0x40(64)
         # Select configuration register, 0x02(02)
         #		0x30(48)	Temperature, Humidity enabled, Resolultion = 14-bits, Heater on
-        bus.write_byte_data(self.I2C_ADDR, 0x02, 0x30)
+        config = self.CONFIG_TRES[temperatureResolution] | self.CONFIG_HRES[humidityResolution]
+        if sequential:
+            config |= self.CONFIG_MODE_SEQUENCE
+        if heater:
+            config |= self.CONFIG_HEAT
+        bus.write_i2c_block_data(self.I2C_ADDR, self.CONFIGURATION, [config, 0x00])
+
+        self.sequential = sequential
+        self.temperature_conversion = self.TEMPERATURE_CONVERSION[temperatureResolution]
+        self.humidity_conversion = self.HUMIDITY_CONVERSION[humidityResolution]
+
+    def Measure(self, register, length, conversion):
+        "Trigger a conversion, wait for it and read length result bytes"
+        triggered = False
+        for attempt in range(self.retries + 1):
+            try:
+                if not triggered:
+                    bus.write_byte(self.I2C_ADDR, register)
+                    triggered = True
+                    time.sleep(conversion)
+                return self.raw.read(length)
+            except (IOError, OSError):
+                # the chip NACKs reads until the conversion is done
+                time.sleep(0.001)
+        raise IOError("No ACK from HDC1000 after %d retries" % self.retries)
+
+    def Read(self):
+        "Temperature in C and humidity in % from one sequential acquisition"
+        if not self.sequential:
+            return self.Temperature(), self.Humidity()
+
+        # temp MSB, temp LSB, humidity MSB, humidity LSB
+        data = self.Measure(self.TEMPERATURE, 4, self.temperature_conversion + self.humidity_conversion)
+        return self.ConvertTemperature(data[0:2]), self.ConvertHumidity(data[2:4])
 
     def Temperature(self):
-        try :
-            bus.write_byte(self.I2C_ADDR,0x00)
-            time.sleep(0.50)
-
-            # Read data back, 2 bytes
-            # temp MSB, temp LSB
-            data0 = bus.read_byte(0x40)
-            data1 = bus.read_byte(0x40)
-
-            # Convert the data
-            temp = (data0 * 256) + data1
-            cTemp = (temp / 65536.0) * 165.0 - 40
-            return cTemp
-        except IOError as err:
-            print("No ACK!")
-            time.sleep(0.1)
-            self.Temperature()
+        if self.sequential:
+            return self.Read()[0]
+
+        # Read data back, 2 bytes
+        # temp MSB, temp LSB
+        data = self.Measure(self.TEMPERATURE, 2, self.temperature_conversion)
+        return self.ConvertTemperature(data)
 
     def Humidity(self):
-        try :
-            bus.write_byte(self.I2C_ADDR,0x01)
-            time.sleep(0.50)
-
-            # Read data back, 2 bytes
-            # humidity MSB, humidity LSB
-            data0 = bus.read_byte(0x40)
-            data1 = bus.read_byte(0x40)
-
-            # Convert the data
-            humidity = (data0 * 256) + data1
-            humidity = (humidity / 65536.0) * 100.0
-            return humidity
-        except IOError as err:
-            print("No ACK!")
-            time.sleep(0.1)
-            self.Humidity()
+        if self.sequential:
+            return self.Read()[1]
+
+        # Read data back, 2 bytes
+        # humidity MSB, humidity LSB
+        data = self.Measure(self.HUMIDITY, 2, self.humidity_conversion)
+        return self.ConvertHumidity(data)
+
+    def ConvertTemperature(self, data):
+        temp = (data[0] * 256) + data[1]
+        cTemp = (temp / 65536.0) * 165.0 - 40
+        return cTemp
+
+    def ConvertHumidity(self, data):
+        humidity = (data[0] * 256) + data[1]
+        humidity = (humidity / 65536.0) * 100.0
+        return humidity
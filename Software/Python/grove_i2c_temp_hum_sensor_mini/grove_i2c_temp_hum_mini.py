@@ -41,35 +41,64 @@ class th02:
 
 	SUCCESS = 0
 
-	def getTemperature(self):
-		bus.write_i2c_block_data(self.ADDRESS, self.TH02_REG_CONFIG, self.TH02_CMD_MEASURE_TEMP)
-
-		while 1:
-			status=self.getStatus()
-			if debug:
-				print("st:",status)
-			if status:
-				break
+	# Conversions take about 35 ms, poll RDY from 1 ms up to 8 ms apart
+	POLL_MIN = 0.001
+	POLL_MAX = 0.008
+	TIMEOUT = 0.2
+
+	pending = None
+	started = 0
+
+	def startTemperature(self):
+		"Start a temperature conversion and return without waiting"
+		self.start(self.TH02_CMD_MEASURE_TEMP)
+
+	def startHumidity(self):
+		"Start a humidity conversion and return without waiting"
+		self.start(self.TH02_CMD_MEASURE_HUMI)
+
+	def start(self, cmd):
+		bus.write_i2c_block_data(self.ADDRESS, self.TH02_REG_CONFIG, cmd)
+		self.pending = cmd
+		self.started = time.time()
+
+	def collect(self, block=True):
+		"""Returns the result of the started conversion.
+
+		With block=False returns None while the conversion is still running,
+		so the bus can be used for other devices in the meantime.
+		"""
+		if self.pending is None:
+			raise RuntimeError("no conversion started")
+
+		delay = self.POLL_MIN
+		while not self.getStatus():
+			if not block:
+				return None
+			if time.time() - self.started > self.TIMEOUT:
+				self.pending = None
+				raise IOError("TH02 conversion timed out")
+			time.sleep(delay)
+			delay = min(delay * 2, self.POLL_MAX)
+
 		t_raw=bus.read_i2c_block_data(self.ADDRESS, self.TH02_REG_DATA_H,3)
 		if debug:
 			print(t_raw)
-		temperature = (t_raw[1]<<8|t_raw[2])>>2
-		return (temperature/32.0)-50.0
+		cmd = self.pending
+		self.pending = None
+		if cmd == self.TH02_CMD_MEASURE_TEMP:
+			temperature = (t_raw[1]<<8|t_raw[2])>>2
+			return (temperature/32.0)-50.0
+		humidity = (t_raw[1]<<8|t_raw[2])>>4
+		return (humidity/16.0)-24.0
+
+	def getTemperature(self):
+		self.startTemperature()
+		return self.collect()
 
 	def getHumidity(self):
-		bus.write_i2c_block_data(self.ADDRESS, self.TH02_REG_CONFIG, self.TH02_CMD_MEASURE_HUMI)
-
-		while 1:
-			status=self.getStatus()
-			if debug:
-				print("st:",status)
-			if status:
-				break
-		t_raw=bus.read_i2c_block_data(self.ADDRESS, self.TH02_REG_DATA_H,3)
-		if debug:
-			print(t_raw)
-		temperature = (t_raw[1]<<8|t_raw[2])>>4
-		return (temperature/16.0)-24.0
+		self.startHumidity()
+		return self.collect()
 
 	def getStatus(self):
 		status=bus.read_i2c_block_data(self.ADDRESS, self.TH02_REG_STATUS,1)
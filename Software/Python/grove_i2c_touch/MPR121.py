@@ -20,6 +20,8 @@
 # THE SOFTWARE.
 import time
 
+import numpy
+
 
 # Register addresses.
 MPR121_I2CADDR_DEFAULT = 0x5A
@@ -61,6 +63,8 @@ MPR121_SOFTRESET       = 0x80
 
 MAX_I2C_RETRIES = 5
 
+ELECTRODES = 12
+
 
 class MPR121(object):
     """Representation of a MPR121 capacitive touch sensor."""
@@ -186,3 +190,55 @@ class MPR121(object):
         assert pin >= 0 and pin < 12, 'pin must be between 0-11 (inclusive)'
         t = self.touched()
         return (t & (1 << pin)) > 0
+
+    def snapshot(self):
+        """Return the touch state, filtered data and baseline data of all
+        electrodes as a tuple (touched, filtered, baseline).  touched is the
+        same 12-bit value as touched(), filtered and baseline are arrays of
+        12 values like filtered_data and baseline_data return.
+
+        Touch status, out of range status and filtered data are contiguous
+        registers, so everything is read with two block reads instead of 24+
+        single register reads.
+        """
+        status = self._i2c_retry(self._device.readList, MPR121_TOUCHSTATUS_L,
+                                 MPR121_FILTDATA_0L + 2*ELECTRODES)
+        base = self._i2c_retry(self._device.readList, MPR121_BASELINE_0,
+                               ELECTRODES)
+        touched = (status[0] | (status[1] << 8)) & 0x0FFF
+        filtered = numpy.array(status[MPR121_FILTDATA_0L:], dtype=numpy.uint8)
+        filtered = filtered.view('<u2') & 0x03FF
+        baseline = numpy.array(base, dtype=numpy.uint16) << 2
+        return touched, filtered, baseline
+
+    def events(self, irq_pin=None, poll_interval=0.001):
+        """Generate (timestamp, pin, touched) tuples each time a pin is
+        touched (touched is True) or released (touched is False).
+
+        When irq_pin is given (a BCM numbered GPIO wired to the IRQ output of
+        the MPR121) the status register is only read after the MPR121 has
+        pulled it low, otherwise only the status register is polled every
+        poll_interval seconds.
+        """
+        if irq_pin is not None:
+            import RPi.GPIO as GPIO
+            if GPIO.getmode() is None:
+                GPIO.setmode(GPIO.BCM)
+            GPIO.setup(irq_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        last = self.touched()
+        while True:
+            if irq_pin is None:
+                time.sleep(poll_interval)
+            elif GPIO.input(irq_pin):
+                # IRQ is high until the touch status changes, reading the
+                # status clears it again.
+                if GPIO.wait_for_edge(irq_pin, GPIO.FALLING, timeout=100) is None:
+                    continue
+            current = self.touched()
+            changed = current ^ last
+            if changed:
+                now = time.time()
+                for pin in range(ELECTRODES):
+                    if changed & (1 << pin):
+                        yield now, pin, (current & (1 << pin)) > 0
+            last = current
@@ -71,7 +71,10 @@ while True:
     # If you're curious or want to see debug info for each pin, uncomment the
     # following lines:
     #print '\t\t\t\t\t\t\t\t\t\t\t\t\t 0x{0:0X}'.format(cap.touched())
-    #filtered = [cap.filtered_data(i) for i in range(12)]
+    #touched, filtered, base = cap.snapshot()
     #print 'Filt:', '\t'.join(map(str, filtered))
-    #base = [cap.baseline_data(i) for i in range(12)]
     #print 'Base:', '\t'.join(map(str, base))
+
+    # For quicker reactions than this loop, cap.events() generates a
+    # (timestamp, pin, touched) tuple for every touch and release, and only
+    # reads the sensor when its IRQ line changes if you pass irq_pin.
@@ -3,6 +3,8 @@
 
 from sys import platform
 import datetime
+import threading
+import time
 
 # Library written for Python 3!
 
@@ -52,8 +54,13 @@ def translateValues(value, left_min, left_max, right_min, right_max):
 class DRV8830:
     # the constructor takes an I2C address and an optional SMBus object
     # if the SMBus object is not provided, it will create one on its own
-    def __init__(self, channel_address, _bus = None):
+    # fault_check_interval is how often (in seconds) motorWrite checks the fault register
+    def __init__(self, channel_address, _bus = None, fault_check_interval = 0.5):
         self.address = channel_address
+        self.fault_check_interval = fault_check_interval
+        # last value written to the control register, None when unknown
+        self.control_value = None
+        self.last_fault_check = 0
 
         if _bus is None:
             self.bus = getNewSMBus()
@@ -94,19 +101,38 @@ class DRV8830:
     # function for actuating the motor on the given address
     # state might be = {STANDBY, REVERSE, FORWARD, BRAKE}
     # percentage_speed can be = 0 -> 100 (represents the percentage of the maximum available thrust)
-    def motorWrite(self, state, percentage_speed = 0):
+    # the control register is only written when its value changes, unless force is set
+    # faults are checked every fault_check_interval seconds and whenever the write fails
+    def motorWrite(self, state, percentage_speed = 0, force = False):
         calculated_speed = int(translateValues(percentage_speed, 0, 100, self.MIN_SPEED, self.MAX_SPEED))
         register_value = (calculated_speed << 2) + state
 
-        self.bus.write_byte_data(self.address, self.CONTROL_REG, register_value)
+        if force or register_value != self.control_value:
+            try:
+                self.bus.write_byte_data(self.address, self.CONTROL_REG, register_value)
+            except IOError:
+                self.control_value = None
+                self.checkFaults()
+                raise
+            self.control_value = register_value
+
+        if time.time() - self.last_fault_check >= self.fault_check_interval:
+            self.checkFaults()
+
+    # function for reading and clearing the fault register
+    # in case we detect a fault
+    # raise a RuntimeWarning with the detailed information
+    def checkFaults(self):
+        self.last_fault_check = time.time()
         fault_strings = self.__readFaults()
-        self.bus.write_byte_data(self.address, self.FAULT_REG, self.CLEAR)
+        if fault_strings is None:
+            return
 
-        # in case we detect a fault
-        # raise a RuntimeWarning with the detailed information
-        if not fault_strings is None:
-            result = "; ".join(fault_strings)
-            raise RuntimeWarning(result)
+        self.bus.write_byte_data(self.address, self.FAULT_REG, self.CLEAR)
+        # the driver may have shut the output down, so rewrite the control register next time
+        self.control_value = None
+        result = "; ".join(fault_strings)
+        raise RuntimeWarning(result)
 
     # private function for reading fault reports from the DRV8830 driver
     # returns a list of strings and each of the strings is about an encountered fault
@@ -126,7 +152,7 @@ class DRV8830:
     # if the motors aren't shut down, then they will continue to work/spin
     # even if you "reboot" the motor driver
     def __del__(self):
-        self.motorWrite(self.STANDBY)
+        self.motorWrite(self.STANDBY, force = True)
 
 # class for managing the 2 DRV8830 drivers the Grove Mini Motor Driver has
 class MiniMotorDriver:
@@ -138,8 +164,8 @@ class MiniMotorDriver:
         else:
             self.bus = _bus
 
-        self.left_motor = DRV8830(ch1)
-        self.right_motor = DRV8830(ch2)
+        self.left_motor = DRV8830(ch1, self.bus)
+        self.right_motor = DRV8830(ch2, self.bus)
         self.display_faults = False
 
         # variables for the implementation I'm bringing on 24th of April
@@ -149,6 +175,9 @@ class MiniMotorDriver:
 
     # private function for printing in a nicely formatted way the strings
     def __print(self, *strings):
+        if not self.display_faults:
+            return
+
         message_string = ""
         for string in strings:
             message_string += "[" + string + "]"
@@ -238,6 +267,74 @@ class MiniMotorDriver:
         self.__writeMotor(self.left_motor, self.left_motor.STANDBY, "left motor warning")
         self.__writeMotor(self.right_motor, self.right_motor.STANDBY, "right motor warning")
 
+    # command both motors with signed speeds in one call
+    # left, right = -100 -> 100 %, negative is reverse and 0 puts the motor in standby
+    # only the control registers whose value changes are written
+    def setSpeeds(self, left, right):
+        for motor, speed, description in ((self.left_motor, left, "left motor warning"),
+                                          (self.right_motor, right, "right motor warning")):
+            if speed > 0:
+                self.__writeMotor(motor, motor.FORWARD, description, min(speed, 100))
+            elif speed < 0:
+                self.__writeMotor(motor, motor.REVERSE, description, min(-speed, 100))
+            else:
+                self.__writeMotor(motor, motor.STANDBY, description)
+
+# class for ramping both motors of a MiniMotorDriver towards target speeds
+# it runs in its own thread and sends setpoints at a fixed control rate (in Hz)
+# acceleration is the largest change of speed in % per second
+# failed writes are retried the next period and counted in errors,
+# the motors are put in standby when the thread exits
+class MotorRamp(threading.Thread):
+    def __init__(self, driver, rate = 100, acceleration = 200):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.driver = driver
+        self.period = 1.0 / rate
+        self.acceleration = acceleration
+        self.speeds = (0.0, 0.0)
+        self.targets = (0.0, 0.0)
+        self.errors = 0
+        self._stop_event = threading.Event()
+
+    # set the signed speeds (-100 -> 100 %) the motors should ramp to
+    def setTargets(self, left, right):
+        self.targets = (left, right)
+
+    # returns True once both motors reached their targets
+    def reached(self):
+        return self.speeds == tuple(self.targets)
+
+    def run(self):
+        next_time = time.time()
+        step = self.acceleration * self.period
+        try:
+            while not self._stop_event.is_set():
+                targets = self.targets
+                self.speeds = tuple(target if abs(target - speed) <= step else speed + step * (1 if target > speed else -1)
+                                    for speed, target in zip(self.speeds, targets))
+                try:
+                    self.driver.setSpeeds(*self.speeds)
+                except IOError:
+                    # the failed motor gets rewritten next period
+                    self.errors += 1
+
+                # keep a fixed rate, skip periods we're late for
+                next_time += self.period
+                now = time.time()
+                if next_time < now:
+                    next_time = now
+                self._stop_event.wait(next_time - now)
+        finally:
+            self.speeds = (0.0, 0.0)
+            try:
+                self.driver.setSpeeds(0, 0)
+            except IOError:
+                self.errors += 1
+
+    def stop(self):
+        self._stop_event.set()
+
 """
 Will be implemented on Monday
 
@@ -33,37 +33,165 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 '''
 # NOTE:
-#	Only currently supports basic reading and writing bytes to the onboard EEPROM, 
+#	Only currently supports basic reading and writing bytes to the onboard EEPROM (NFCTag caches it), 
 #	no support for locking or anything clever, that stuff shouldn't be too hard to add if you
 #	read the datasheet though
 
 import time,sys
 import RPi.GPIO as GPIO
 import smbus
+from i2c_raw import RawI2C
 
 NFC_ADDR = 0x53
 
+# M24LR64E-R user memory
+EEPROM_SIZE = 8192
+# bytes programmed by one I2C write cycle, writes must not cross a page boundary
+PAGE_SIZE = 4
+# largest chunk read in one I2C transfer
+BLOCK_SIZE = 32
+# the datasheet write cycle is 5 ms per page
+WRITE_TIMEOUT = 0.05
+
 # use the bus that matches your raspi version
 rev = GPIO.RPI_REVISION
 if rev == 2 or rev == 3:
-    bus = smbus.SMBus(1)
+    bus_number = 1
 else:
-    bus = smbus.SMBus(0)
-    
+    bus_number = 0
+bus = smbus.SMBus(bus_number)
+
+# smbus block reads send a single command byte, but the EEPROM takes a two byte
+# address, so reads go through a raw handle after setting the address pointer
+raw = None
+
+def rawHandle():
+  global raw
+  if raw is None:
+    raw = RawI2C(bus_number, NFC_ADDR)
+  return raw
+
+# close the raw handle, the next read opens it again
+def closeNFC():
+  global raw
+  if raw is not None:
+    raw.close()
+    raw = None
+
 # read data from the NFC tag EEPROM (length bytes)
 def readNFCData(addr,length):
   bus.write_byte_data(NFC_ADDR,addr>>8,addr&0xff)
   result=[]
-  for c in range(length):
-    result.append(bus.read_byte(NFC_ADDR))
+  # the address counter keeps incrementing between reads
+  while len(result) < length:
+    result.extend(rawHandle().read(min(BLOCK_SIZE,length-len(result))))
   return result
 
+# wait for the end of a write cycle, the EEPROM does not ACK its address until then
+def waitNFCReady(timeout=WRITE_TIMEOUT):
+  deadline=time.time()+timeout
+  while True:
+    try:
+      bus.write_quick(NFC_ADDR)
+      return
+    except IOError:
+      if time.time() > deadline:
+        raise IOError("NFC tag EEPROM still busy after %.0f ms" % (timeout*1000))
+      time.sleep(0.0005)
+
+# write up to PAGE_SIZE bytes inside one page and wait for the write cycle
+def writeNFCPage(addr,data):
+  bus.write_i2c_block_data(NFC_ADDR,addr>>8,[addr&0xff]+list(data))
+  waitNFCReady()
+
 # write data to the NFC tag EEPROM  (writes <data> to byte address addr)
 def writeNFCData(addr,data):
-    for byte in data:
-      bus.write_word_data(NFC_ADDR,addr>>8,(addr&0xff | (byte<<8)))
-      time.sleep(0.01)
-      addr+=1
+    data=list(data)
+    while data:
+      count=PAGE_SIZE-addr%PAGE_SIZE
+      writeNFCPage(addr,data[:count])
+      data=data[count:]
+      addr+=count
+
+# Cached image of the tag EEPROM
+# Blocks are read on first access and writes only change the image, flush()
+# then programs just the pages whose contents changed.
+# Call reload() if the tag may have been written over RF.
+# Used in a with statement it flushes and closes the raw I2C handle at the end.
+class NFCTag(object):
+  def __init__(self,size=EEPROM_SIZE):
+    self.size=size
+    self.image=bytearray(size)
+    self.loaded=[False]*((size+BLOCK_SIZE-1)//BLOCK_SIZE)
+    self.dirty=set()
+
+  def close(self):
+    closeNFC()
+
+  def __enter__(self):
+    return self
+
+  # flushes the changed pages unless the block raised
+  def __exit__(self, exc_type, exc_value, traceback):
+    try:
+      if exc_type is None:
+        self.flush()
+    finally:
+      self.close()
+
+  def reload(self):
+    self.loaded=[False]*len(self.loaded)
+    self.dirty=set()
+
+  # read the blocks covering addr..addr+length that are not cached yet
+  def load(self,addr,length):
+    block=addr//BLOCK_SIZE
+    last=(addr+length-1)//BLOCK_SIZE
+    while block <= last:
+      if self.loaded[block]:
+        block+=1
+        continue
+      # one transfer for each run of missing blocks
+      end=block
+      while end+1 <= last and not self.loaded[end+1]:
+        end+=1
+      start=block*BLOCK_SIZE
+      stop=min((end+1)*BLOCK_SIZE,self.size)
+      self.image[start:stop]=bytearray(readNFCData(start,stop-start))
+      for i in range(block,end+1):
+        self.loaded[i]=True
+      block=end+1
+
+  def check(self,addr,length):
+    if addr < 0 or addr+length > self.size:
+      raise ValueError("%d bytes at %d outside of the %d byte EEPROM" % (length,addr,self.size))
+
+  def read(self,addr,length):
+    self.check(addr,length)
+    if length:
+      self.load(addr,length)
+    return self.image[addr:addr+length]
+
+  def write(self,addr,data):
+    data=bytearray(data)
+    self.check(addr,len(data))
+    if not data:
+      return
+    # whole pages get written back, so they must be cached first
+    self.load(addr,len(data))
+    for i in range(len(data)):
+      if self.image[addr+i] != data[i]:
+        self.image[addr+i]=data[i]
+        self.dirty.add((addr+i)//PAGE_SIZE)
+
+  # program the changed pages, returns how many were written
+  def flush(self):
+    pages=sorted(self.dirty)
+    for page in pages:
+      addr=page*PAGE_SIZE
+      writeNFCPage(addr,self.image[addr:addr+PAGE_SIZE])
+      self.dirty.discard(page)
+    return len(pages)
 
 # example code
 if __name__=="__main__":         
@@ -73,3 +201,7 @@ if __name__=="__main__":
     time.sleep(0.1)
     print(readNFCData(0,16)) # this should show the changed data
 
+    tag=NFCTag()
+    tag.write(4,[21,22]) # only changes the cached image
+    print(tag.flush()) # writes back the one changed page
+    print(list(tag.read(0,16)))
@@ -43,6 +43,12 @@ Command_Mode=0x80
 Data_mode=0x40
 
 Normal_Display_Cmd=0xA4
+Set_Start_Line_Cmd=0xA1
+
+Text_Rows=12         # 96 pixels / 8 pixel rows
+Ram_Text_Rows=16     # 128 rows of GDDRAM / 8 pixel rows
+Text_Columns=12      # 96 pixels / 8 pixel columns
+I2C_Block_Size=32    # max bytes per SMBus block write
 
 BasicFont = [[0 for x in range(8)] for x in range(10)]
 BasicFont=[[0x00,0x00,0x00,0x00,0x00,0x00,0x00,0x00],
@@ -160,6 +166,15 @@ def sendData(byte):
         print("IOError")
         return -1
 
+def sendDataBlock(data):
+    # Send a run of display data using as few I2C block writes as possible
+    try:
+        for i in range(0,len(data),I2C_Block_Size):
+            bus.write_i2c_block_data(address,Data_mode,list(data[i:i+I2C_Block_Size]))
+    except IOError:
+        print("IOError")
+        return -1
+
 def multi_comm(commands):
     for c in commands:
         sendCommand(c)
@@ -255,3 +270,72 @@ def oled_putChar(C):
 def oled_putString(String):
     for i in range(len(String)):
         oled_putChar(String[i])
+
+def oled_renderString(String):
+    # Return the gray-scale data for a string in vertical mode, ready for sendDataBlock()
+    data=[]
+    for C in String:
+        C_add=ord(C)
+        if C_add<32 or C_add>127:     # Ignore non-printable ASCII characters
+            C_add=ord(' ')
+        glyph=BasicFont[C_add-32]
+        for i in range(0,8,2):
+            for j in range(0,8):
+                c=0x00
+                if (glyph[i]>>j)&0x01:
+                    c=c|grayH
+                if (glyph[i+1]>>j)&0x01:
+                    c=c|grayL
+                data.append(c)
+    return data
+
+def oled_setStartLine(line):
+    # Map GDDRAM row 'line' (0-127) to the top of the screen
+    sendCommand(Set_Start_Line_Cmd)
+    sendCommand(line & 0x7F)
+
+class ScrollingConsole(object):
+    '''
+    Text console that scrolls by one text row using the display start line.
+
+    The SSD1327 has 128 rows of GDDRAM but only shows 96, so a new line is
+    drawn into the hidden row below the screen and then scrolled into view
+    by moving the start line.  Each message costs one row of data instead
+    of a full-screen repaint.  The display must be in vertical mode (see
+    oled_setVerticalMode).
+    '''
+
+    def __init__(self):
+        self.top=0      # GDDRAM text row currently shown at the top
+        self.lines=0    # number of rows written since the last clear
+
+    def clear(self):
+        oled_setStartLine(0)
+        blank=[0x00]*(Text_Columns*32)
+        for row in range(Ram_Text_Rows):
+            oled_setTextXY(row,0)
+            sendDataBlock(blank)
+        self.top=0
+        self.lines=0
+
+    def write(self,text):
+        for line in str(text).split('\n'):
+            self.putLine(line)
+
+    def putLine(self,line):
+        line=line[:Text_Columns].ljust(Text_Columns)
+        if self.lines<Text_Rows:
+            row=self.lines
+            self.lines+=1
+            self._drawRow(row,line)
+            return
+
+        # The screen is full: draw into the hidden row below it and scroll up
+        row=(self.top+Text_Rows)%Ram_Text_Rows
+        self._drawRow(row,line)
+        self.top=(self.top+1)%Ram_Text_Rows
+        oled_setStartLine(self.top*8)
+
+    def _drawRow(self,row,line):
+        oled_setTextXY(row,0)
+        sendDataBlock(oled_renderString(line))
@@ -4,6 +4,8 @@
 import serial
 import binascii
 import struct
+import time
+import zlib
 
 # Library written for Python 3!
 
@@ -31,6 +33,16 @@ class RFLinker:
 
         self.end_condition = '\r\n' # CR + LF for ending a transmssion
 
+        # binary framing, see writeBinary
+        self.binary_sync = b'\x02\x01\x1b' # same bytes as delimiter + start_condition
+        self.binary_header = struct.Struct('!BBBBBHBI') # id, index, count, fec group, chunk size, total length, fragment length, message CRC32
+        self.fec_group = 4 # one parity fragment per fec_group data fragments, 0 disables it
+        self.message_id = 0
+        self.read_buffer = bytearray()
+        self.partial_messages = {} # message id -> fragments received so far
+        self.completed_messages = {} # message id -> time, so repeats aren't delivered twice
+        self.message_timeout = 5.0 # seconds before a message id is considered reused
+
     # private function for displaying information
     def __print(self, *strings):
         if not self.display_verbose:
@@ -105,6 +117,12 @@ class RFLinker:
         if max_bad_readings > 0:
             self.max_bad_readings = max_bad_readings
 
+    # function for setting how many data fragments share a parity fragment
+    # 0 sends no parity fragments, the group size is sent in one header byte so it's at most 255
+    def setFecGroup(self, fec_group):
+        if 0 <= fec_group <= 255:
+            self.fec_group = fec_group
+
     # function we call from the user-program to send messages
     def writeMessage(self, message):
         # determine how many fragments/transmssions are needed
@@ -126,6 +144,144 @@ class RFLinker:
                 message = message[chunked_message_lengths.pop(0):]
                 count -= 1
 
+    # private function for XOR-ing fragments padded to the chunk size
+    def __parity(self, fragments, chunk):
+        parity = 0
+        for fragment in fragments:
+            parity ^= int.from_bytes(fragment.ljust(chunk, b'\x00'), 'big')
+        return parity.to_bytes(chunk, 'big')
+
+    # private function for building one binary frame
+    def __binaryFrame(self, message_id, index, count, chunk, total, message_crc32, payload):
+        header = self.binary_header.pack(message_id, index, count, self.fec_group, chunk, total, len(payload), message_crc32)
+        crc32 = zlib.crc32(header + payload) & 0xffffffff
+        return self.binary_sync + header + payload + struct.pack('!I', crc32)
+
+    # function for sending bytes with binary framing
+    #
+    # the message is split in chunk_size fragments, each sent in its own frame:
+    # sync bytes, header, fragment and a CRC32 over the header and fragment
+    # the header also carries a CRC32 of the whole message, checked once it's put back together
+    # each fec_group data fragments are followed by a parity fragment
+    # so the receiver can rebuild one lost fragment per group
+    # with repeat > 1 the frames are sent again and the receiver only uses
+    # the repeats to fill in fragments it's still missing
+    def writeBinary(self, message, repeat = 1):
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        chunk = min(self.chunk_size, 255)
+        total = len(message)
+        if total > 0xffff:
+            raise ValueError('[rflink : message too long]')
+        count = max((total + chunk - 1) // chunk, 1)
+        if count > 255:
+            raise ValueError('[rflink : too many fragments, increase chunk_size]')
+
+        message_crc32 = zlib.crc32(message) & 0xffffffff
+        fragments = [message[i * chunk:(i + 1) * chunk] for i in range(count)]
+        frames = [self.__binaryFrame(self.message_id, i, count, chunk, total, message_crc32, fragments[i]) for i in range(count)]
+        if self.fec_group > 0:
+            for group in range((count + self.fec_group - 1) // self.fec_group):
+                parity = self.__parity(fragments[group * self.fec_group:(group + 1) * self.fec_group], chunk)
+                frames.append(self.__binaryFrame(self.message_id, count + group, count, chunk, total, message_crc32, parity))
+
+        outgoing_message = b''.join(frames)
+        self.__print('binary message', self.message_id, count, len(outgoing_message))
+        for _ in range(repeat):
+            self.serial.write(outgoing_message)
+        self.message_id = (self.message_id + 1) & 0xff
+
+    # private function for parsing the binary frames in read_buffer
+    # returns a completed message or None
+    def __parseFrames(self):
+        buffer = self.read_buffer
+        header_size = len(self.binary_sync) + self.binary_header.size
+        message = None
+        while message is None:
+            start = buffer.find(self.binary_sync)
+            if start < 0:
+                # keep what could be the beginning of a sync sequence
+                del buffer[:max(len(buffer) - len(self.binary_sync) + 1, 0)]
+                break
+            del buffer[:start]
+            if len(buffer) < header_size:
+                break
+            header = bytes(buffer[len(self.binary_sync):header_size])
+            message_id, index, count, fec_group, chunk, total, length, message_crc32 = self.binary_header.unpack(header)
+            if len(buffer) < header_size + length + 4:
+                break
+            payload = bytes(buffer[header_size:header_size + length])
+            crc32 = struct.unpack('!I', bytes(buffer[header_size + length:header_size + length + 4]))[0]
+            if crc32 != zlib.crc32(header + payload) & 0xffffffff or length > chunk:
+                # noise that looked like a sync sequence
+                self.__print('bad frame')
+                del buffer[:1]
+                continue
+            del buffer[:header_size + length + 4]
+            message = self.__addFragment(message_id, index, count, fec_group, chunk, total, message_crc32, payload)
+        return message
+
+    # private function for collecting a fragment, returns the message once complete
+    def __addFragment(self, message_id, index, count, fec_group, chunk, total, message_crc32, payload):
+        now = time.time()
+        if now - self.completed_messages.get(message_id, 0) < self.message_timeout:
+            return None
+
+        # message ids wrap, so drop messages that never completed before their id comes around again
+        for stale_id in [i for i, state in self.partial_messages.items() if now - state['first_seen'] >= self.message_timeout]:
+            del self.partial_messages[stale_id]
+
+        state = self.partial_messages.get(message_id)
+        if state is None or (state['count'], state['chunk'], state['total'], state['crc32']) != (count, chunk, total, message_crc32):
+            state = {'count': count, 'fec_group': fec_group, 'chunk': chunk, 'total': total, 'crc32': message_crc32,
+                     'first_seen': now, 'fragments': {}}
+            self.partial_messages[message_id] = state
+        state['fragments'][index] = payload
+        self.__print('fragment', message_id, index, count)
+
+        fragments = state['fragments']
+        if fec_group > 0:
+            # rebuild a lost data fragment from its group's parity fragment
+            for group in range((count + fec_group - 1) // fec_group):
+                members = range(group * fec_group, min((group + 1) * fec_group, count))
+                missing = [i for i in members if i not in fragments]
+                if len(missing) == 1 and count + group in fragments:
+                    recovered = self.__parity([fragments[i] for i in members if i in fragments] + [fragments[count + group]], chunk)
+                    fragments[missing[0]] = recovered[:min(chunk, total - missing[0] * chunk)]
+
+        if all(i in fragments for i in range(count)):
+            del self.partial_messages[message_id]
+            message = b''.join(fragments[i] for i in range(count))[:total]
+            if zlib.crc32(message) & 0xffffffff != message_crc32:
+                self.__print('bad message', message_id)
+                return None
+            self.completed_messages[message_id] = now
+            return message
+        return None
+
+    # function for reading messages sent with writeBinary
+    # returns the message bytes, or empty bytes if nothing complete arrived within timeout seconds
+    def readBinary(self, timeout = 5.0):
+        deadline = time.time() + timeout
+        # readMessage relies on the timeout the port was opened with
+        serial_timeout = self.serial.timeout
+        try:
+            while True:
+                message = self.__parseFrames()
+                if message is not None:
+                    return message
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return b''
+                # block for the first byte, then take everything already buffered
+                self.serial.timeout = min(remaining, 0.1)
+                data = self.serial.read(max(self.serial.in_waiting, 1))
+                self.read_buffer += data
+                if len(self.read_buffer) > 4096:
+                    del self.read_buffer[:-4096]
+        finally:
+            self.serial.timeout = serial_timeout
+
     # private function for reading data
     # it's a recursive function and works in tandem with readMessage function
     def __readFraments(self, first_time, met_first_trans, last_counter = 1):
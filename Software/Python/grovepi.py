@@ -123,6 +123,18 @@ ledBarToggleOne_cmd = [54]
 ledBarSet_cmd = [55]
 # Get current state
 ledBarGet_cmd = [56]
+# Clear the stored animation
+ledBarSeqClear_cmd = [57]
+# Set the delay of the animation frames added next
+ledBarSeqDelay_cmd = [58]
+# Add a frame to the animation
+ledBarSeqFrame_cmd = [59]
+# Play the stored animation
+ledBarSeqPlay_cmd = [60]
+# Stop the animation
+ledBarSeqStop_cmd = [61]
+# Max number of frames the firmware can store per LED Bar
+ledBarSeqMaxFrames = 12
 
 # Grove 4 Digit Display commands
 # Initialise
@@ -159,6 +171,12 @@ chainableRgbLedSetPattern_cmd = [93]
 chainableRgbLedSetModulo_cmd = [94]
 # sets leds similar to a bar graph, reversible
 chainableRgbLedSetLevel_cmd = [95]
+# store the colors of a range of leds without showing them
+chainableRgbLedSetColors_cmd = [96]
+# show the stored colors on the whole chain
+chainableRgbLedShow_cmd = [97]
+# how many led colors fit in one command 96 (32 byte I2C buffer on the GrovePi)
+chainableRgbLedColorsPerBlock = 9
 
 # Read the button from IR sensor
 ir_read_cmd = [21]
@@ -439,6 +457,105 @@ def ledBar_getBits(pin):
 	block = read_identified_i2c_block(ledBarGet_cmd, no_bytes = 2)
 	return block[0] ^ (block[1] << 8)
 
+# Grove LED Bar - upload an animation and play it on the GrovePi
+# frames: list of (state, delay) pairs, state (0-1023) a bit for each of the 10 LEDs, delay in ms (0-65535)
+# repeat: how many times to play the frames, 0 loops forever
+# at most ledBarSeqMaxFrames frames are stored, once it's playing no more commands are needed
+def ledBar_sequence(pin, frames, repeat = 0):
+	if len(frames) > ledBarSeqMaxFrames:
+		raise ValueError("at most %d frames can be stored" % ledBarSeqMaxFrames)
+
+	write_i2c_block(ledBarSeqClear_cmd + [pin, unused, unused])
+	read_i2c_block(no_bytes = 1)
+	delay = None
+	for state, frame_delay in frames:
+		# the delay sticks to the following frames, so only send it when it changes
+		if frame_delay != delay:
+			delay = frame_delay
+			write_i2c_block(ledBarSeqDelay_cmd + [pin, delay & 255, delay >> 8])
+			read_i2c_block(no_bytes = 1)
+		write_i2c_block(ledBarSeqFrame_cmd + [pin, state & 255, state >> 8])
+		read_i2c_block(no_bytes = 1)
+	write_i2c_block(ledBarSeqPlay_cmd + [pin, repeat, unused])
+	read_i2c_block(no_bytes = 1)
+	return 1
+
+# Grove LED Bar - stop the animation, the current frame stays lit
+def ledBar_stopSequence(pin):
+	write_i2c_block(ledBarSeqStop_cmd + [pin, unused, unused])
+	read_i2c_block(no_bytes = 1)
+	return 1
+
+class LedBar(object):
+	'''
+	Grove LED Bar with a local copy of its state.
+
+	The state is only written to the GrovePi when it changes and
+	reading it back doesn't need a round trip, unless an animation
+	started with sequence() has left it unknown.
+
+	pin - D2-D8 pins
+	orientation - (0 = red to green, 1 = green to red)
+	'''
+
+	def __init__(self, pin, orientation = 0):
+		self.pin = pin
+		self.green_to_red = orientation
+		self.state = 0
+		ledBar_init(pin, orientation)
+
+	# orientation: (0 = red to green,  1 = green to red)
+	def orientation(self, orientation):
+		if orientation != self.green_to_red:
+			ledBar_orientation(self.pin, orientation)
+			self.green_to_red = orientation
+		return 1
+
+	# level: (0-10)
+	def setLevel(self, level):
+		level = max(0, min(10, level))
+		return self.setBits((1 << level) - 1)
+
+	# led: which led (1-10)
+	# state: off or on (0-1)
+	def setLed(self, led, state):
+		led = max(1, min(10, led)) - 1
+		bits = self.getBits()
+		if state:
+			bits |= 1 << led
+		else:
+			bits &= ~(1 << led)
+		return self.setBits(bits)
+
+	# led: which led (1-10)
+	def toggleLed(self, led):
+		led = max(1, min(10, led)) - 1
+		return self.setBits(self.getBits() ^ (1 << led))
+
+	# state: (0-1023) a bit for each of the 10 LEDs
+	def setBits(self, state):
+		state &= 0x3FF
+		if state != self.state:
+			ledBar_setBits(self.pin, state)
+			self.state = state
+		return 1
+
+	def getBits(self):
+		if self.state is None:
+			self.state = ledBar_getBits(self.pin)
+		return self.state
+
+	# frames: list of (state, delay) pairs, see ledBar_sequence
+	def sequence(self, frames, repeat = 0):
+		ledBar_sequence(self.pin, frames, repeat)
+		self.state = None
+		return 1
+
+	def stopSequence(self):
+		ledBar_stopSequence(self.pin)
+		self.state = None
+		return 1
+
 
 # Grove 4 Digit Display - initialise
 def fourDigit_init(pin):
@@ -497,9 +614,15 @@ def fourDigit_score(pin, left, right):
 # analog: analog pin to read
 # duration: analog read for this many seconds
 def fourDigit_monitor(pin, analog, duration):
+	fourDigit_monitor_start(pin, analog, duration)
+	time.sleep(duration)
+	return 1
+
+# Grove 4 Digit Display - start displaying analogRead values without waiting for them to finish
+# the GrovePi does not answer other commands until duration seconds have passed
+def fourDigit_monitor_start(pin, analog, duration):
 	write_i2c_block(fourDigitAnalogRead_cmd + [pin, analog, duration])
 	read_i2c_block(no_bytes = 1)
-	time.sleep(duration)
 	return 1
 
 # Grove 4 Digit Display - turn entire display on (88:88)
@@ -514,6 +637,136 @@ def fourDigit_off(pin):
 	read_i2c_block(no_bytes = 1)
 	return 1
 
+class FourDigitDisplay(object):
+	'''
+	Grove 4 Digit Display with a local copy of what is being shown.
+
+	Writes that would not change the display are dropped and bursts of
+	updates are coalesced so that at most max_rate commands per second
+	are sent to the GrovePi. Values set faster than that are kept pending
+	and written out by the next call to update() once the interval has
+	passed.
+
+	pin - D2-D8 pins
+	max_rate - maximum number of writes per second, 0 for no limit
+	'''
+
+	def __init__(self, pin, max_rate = 10):
+		self.pin = pin
+		self.min_interval = 1.0 / max_rate if max_rate else 0
+		self.last_write = 0
+		self.busy_until = 0
+		# commands currently on the display, keyed by what they cover:
+		# "all" for the whole display or the segment index
+		self.shown = {}
+		self.pending = []
+		self.brightness_shown = None
+		self.brightness_pending = None
+		fourDigit_init(pin)
+
+	# value: (0-65535) or (0000-FFFF)
+	def number(self, value, leading_zero = False):
+		return self._set("all", fourDigit_number, (value, leading_zero))
+
+	# left: (0-255) or (0-FF)
+	# right: (0-255) or (0-FF)
+	def score(self, left, right):
+		return self._set("all", fourDigit_score, (left, right))
+
+	# segment: (0-3)
+	# value: (0-15) or (0-F)
+	def digit(self, segment, value):
+		return self._set(segment, fourDigit_digit, (segment, value))
+
+	# segment: (0-3)
+	# leds: (0-255) or (0-0xFF) one bit per led, segment 2 is special, 8th bit is the colon
+	def segment(self, segment, leds):
+		return self._set(segment, fourDigit_segment, (segment, leds))
+
+	def on(self):
+		return self._set("all", fourDigit_on, ())
+
+	def off(self):
+		return self._set("all", fourDigit_off, ())
+
+	# brightness: (0-7)
+	def brightness(self, brightness):
+		self.brightness_pending = brightness
+		return self.update()
+
+	def monitor(self, analog, duration):
+		'''
+		Show analogRead values of the analog pin for duration seconds.
+
+		Unlike fourDigit_monitor this returns straight away. The GrovePi
+		is busy until the monitor ends, so values set on the display in
+		the meantime are held back and written by update() afterwards.
+		'''
+		self.update(force = True)
+		fourDigit_monitor_start(self.pin, analog, duration)
+		self.last_write = time.time()
+		self.busy_until = self.last_write + duration
+		self.shown = {}
+
+	def busy(self):
+		return time.time() < self.busy_until
+
+	def update(self, force = False):
+		'''
+		Write pending changes if the rate limit allows it.
+
+		At most one command is sent per 1 / max_rate seconds, the rest
+		stays pending for later calls.
+
+		force - write everything now, ignoring the rate limit (but not a running monitor)
+
+		Returns True when nothing is left pending.
+		'''
+		while self.pending or self.brightness_pending is not None:
+			now = time.time()
+			if now < self.busy_until:
+				return False
+			if not force and now - self.last_write < self.min_interval:
+				return False
+
+			# one command per interval, brightness first
+			if self.brightness_pending is not None:
+				brightness = self.brightness_pending
+				self.brightness_pending = None
+				if brightness == self.brightness_shown:
+					continue
+				fourDigit_brightness(self.pin, brightness)
+				self.last_write = time.time()
+				self.brightness_shown = brightness
+				# brightness is not visible until the next command, so resend the display
+				if not self.pending:
+					self.pending = list(self.shown.items())
+				self.shown = {}
+				continue
+
+			key, command = self.pending.pop(0)
+			if self.shown.get(key) == command:
+				continue
+			function, args = command
+			function(self.pin, *args)
+			self.last_write = time.time()
+			if key == "all":
+				self.shown = {"all": command}
+			else:
+				self.shown.pop("all", None)
+				self.shown[key] = command
+
+		return True
+
+	def _set(self, key, function, args):
+		command = (function, args)
+		if key == "all":
+			self.pending = [(key, command)]
+		else:
+			self.pending = [item for item in self.pending if item[0] != key]
+			self.pending.append((key, command))
+		return self.update()
+
 # Grove Chainable RGB LED - store a color for later use
 # red: 0-255
 # green: 0-255
@@ -563,6 +816,24 @@ def chainableRgbLed_setLevel(pin, level, reverse):
 	read_i2c_block(no_bytes = 1)
 	return 1
 
+# Grove Chainable RGB LED - store a color for each led of a range, they're not shown until chainableRgbLed_show is called
+# colors: list of (red, green, blue) tuples, 0-255 each
+# firstLed: index of the led that gets the first color, 0 = led closest to the GrovePi
+def chainableRgbLed_setColors(pin, colors, firstLed = 0):
+	for i in range(0, len(colors), chainableRgbLedColorsPerBlock):
+		block = chainableRgbLedSetColors_cmd + [pin, firstLed + i]
+		for red, green, blue in colors[i:i + chainableRgbLedColorsPerBlock]:
+			block += [red, green, blue]
+		write_i2c_block(block)
+		read_i2c_block(no_bytes = 1)
+	return 1
+
+# Grove Chainable RGB LED - show the colors stored with chainableRgbLed_setColors, all leds change at once
+def chainableRgbLed_show(pin):
+	write_i2c_block(chainableRgbLedShow_cmd + [pin, unused, unused])
+	read_i2c_block(no_bytes = 1)
+	return 1
+
 def set_pin_interrupt(pin, ftype, interrupt_mode, period):
 	'''
 	Attach an interrupt to a pin.
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+#
+# Raw I2C access for the GrovePi drivers that need transfers smbus can't do
+#
+# The GrovePi connects the Raspberry Pi and Grove sensors.  You can learn more about GrovePi here:  http://www.dexterindustries.com/GrovePi
+#
+# Have a question about this library?  Ask on the forums here:  http://forum.dexterindustries.com/c/grovepi
+#
+
+# Released under the MIT license (http://choosealicense.com/licenses/mit/).
+# For more information see https://github.com/DexterInd/GrovePi/blob/master/LICENSE
+
+import os
+import fcntl
+
+# ioctl to set the slave address of a raw /dev/i2c-N handle
+I2C_SLAVE = 0x0703
+
+class RawI2C(object):
+    '''
+    /dev/i2c-N handle talking to one device.
+
+    smbus reads always write a register pointer first, read() is a plain
+    read of length bytes from wherever the device is.  Call close() when
+    done, or use it in a with statement.
+    '''
+    def __init__(self, bus_number, address):
+        self.fd = os.open('/dev/i2c-%d' % bus_number, os.O_RDWR)
+        try:
+            fcntl.ioctl(self.fd, I2C_SLAVE, address)
+        except (IOError, OSError):
+            self.close()
+            raise
+
+    def read(self, length):
+        return bytearray(os.read(self.fd, length))
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()